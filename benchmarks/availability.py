@@ -0,0 +1,79 @@
+"""Benchmark candidate lookup against roster size.
+
+Compares the availability index used by Scheduler with the linear scans it
+replaced, for rosters from 100 to 100,000 employees.
+
+Run from the repository root:
+    python -m benchmarks.availability
+"""
+import random
+import time
+
+from python.scheduler import Scheduler, Shift
+
+SIZES = [100, 1_000, 10_000, 100_000]
+LOOKUPS = 200
+
+
+def build_scheduler(size: int, seed: int = 0, compact: bool = False) -> Scheduler:
+    """Build a scheduler with random single-shift preferences."""
+    rng = random.Random(seed)
+    codes = ['M', 'A', 'E', 'N']
+    scheduler = Scheduler(compact=compact)
+    for i in range(size):
+        preferred_shifts = {}
+        for day in scheduler.days:
+            shift = Shift.from_code(rng.choice(codes))
+            if shift != Shift.NO_SHIFT:
+                preferred_shifts[day] = [shift]
+        scheduler.add_employee(f"Employee{i}", preferred_shifts)
+    return scheduler
+
+
+def linear_available(scheduler: Scheduler, day: str, shift: Shift):
+    """The list comprehension get_available_employees used before the index."""
+    return [
+        emp for emp in scheduler.employees
+        if emp.days_worked < 5
+        and day not in emp.assigned_shifts
+        and shift in emp.preferred_shifts.get(day, [])
+    ]
+
+
+def linear_assignable(scheduler: Scheduler, day: str):
+    """The list comprehension resolve_conflicts used before the index."""
+    return [
+        emp for emp in scheduler.employees
+        if emp.days_worked < 5 and day not in emp.assigned_shifts
+    ]
+
+
+def time_per_call(func, *args) -> float:
+    """Average wall-clock time of one call in microseconds."""
+    start = time.perf_counter()
+    for _ in range(LOOKUPS):
+        func(*args)
+    return (time.perf_counter() - start) / LOOKUPS * 1e6
+
+
+def main():
+    print(f"{'employees':>10} {'scan (us)':>12} {'index (us)':>12} "
+          f"{'fill scan (us)':>15} {'fill index (us)':>16}")
+    for size in SIZES:
+        scheduler = build_scheduler(size)
+        day, shift = "Wednesday", Shift.MORNING
+        scan = time_per_call(linear_available, scheduler, day, shift)
+        # Preferred candidates are returned as a list, so the indexed cost still
+        # grows with the number of matches; the random fill below does not.
+        index = time_per_call(scheduler.get_available_employees, day, shift)
+        fill_scan = time_per_call(lambda: random.choice(linear_assignable(scheduler, day)))
+        fill_index = time_per_call(lambda: random.choice(scheduler._assignable[day].items))
+        print(f"{size:>10} {scan:>12.1f} {index:>12.1f} {fill_scan:>15.1f} {fill_index:>16.2f}")
+
+        start = time.perf_counter()
+        scheduler.generate_schedule()
+        print(f"{'':>10} generate_schedule: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
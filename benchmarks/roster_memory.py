@@ -0,0 +1,58 @@
+"""Measure roster memory in object mode and compact mode.
+
+Loads the same synthetic roster into Scheduler() and Scheduler(compact=True)
+and reports the bytes allocated per employee, as seen by tracemalloc. The
+availability index is the same in both modes and is reported separately.
+
+Run from the repository root:
+    python -m benchmarks.roster_memory
+"""
+import gc
+import tracemalloc
+
+from benchmarks.availability import build_scheduler
+from python.scheduler import Scheduler
+
+SIZES = [1_000, 10_000, 100_000]
+
+
+def index_bytes(scheduler: Scheduler) -> int:
+    """Rough size of the availability index, measured by rebuilding it."""
+    roster = scheduler.roster
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    probe = Scheduler(compact=True)
+    probe.roster = roster
+    for row in range(len(roster)):
+        probe._index_row(row)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used
+
+
+def allocated(size: int, compact: bool) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    scheduler = build_scheduler(size, compact=compact)
+    scheduler.generate_schedule()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used, scheduler
+
+
+def main():
+    print(f"{'employees':>10} {'object B/emp':>13} {'compact B/emp':>14} "
+          f"{'index B/emp':>12} {'roster reduction':>17}")
+    for size in SIZES:
+        object_bytes, _ = allocated(size, compact=False)
+        compact_bytes, scheduler = allocated(size, compact=True)
+        index = index_bytes(scheduler)
+        reduction = (object_bytes - index) / max(compact_bytes - index, 1)
+        print(f"{size:>10} {object_bytes / size:>13.0f} {compact_bytes / size:>14.0f} "
+              f"{index / size:>12.0f} {reduction:>16.1f}x")
+
+
+if __name__ == "__main__":
+    main()
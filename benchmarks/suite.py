@@ -0,0 +1,196 @@
+"""Benchmark suite for the scheduler hot paths.
+
+For each roster size and preference skew a synthetic CSV is generated and
+these phases are timed separately:
+
+    validate    Scheduler.validate_csv_format
+    load        Scheduler.load_from_csv
+    generate    Scheduler.generate_schedule (seeded)
+    save        Scheduler.save_to_csv
+    gui         SchedulerGUI.display_schedule (skipped without a display)
+    python_cli  python -m python.scheduler, end to end, in a subprocess
+    headless    python -m python.scheduler generate, file in and out, in a
+                subprocess; on small rosters this is mostly cold-start time
+    cpp_cli     cpp/scheduler.cpp, end to end (skipped without a compiler)
+
+The best of ``--repeat`` runs is recorded. Results are written as JSON with
+the commit they were measured on; ``--baseline`` compares against an
+earlier file and exits with status 1 when a phase got slower than
+``--threshold``.
+
+Run from the repository root:
+    python -m benchmarks.suite --sizes 1000 10000 --skews 0.33 1 --output bench.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.synthetic import write_roster
+from python.scheduler import Scheduler
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def best_time(func: Callable[[], object], repeat: int) -> float:
+    """Fastest of ``repeat`` calls, in seconds, with stdout silenced."""
+    best = float('inf')
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+def loaded_scheduler(path: str) -> Scheduler:
+    scheduler = Scheduler()
+    with contextlib.redirect_stdout(io.StringIO()):
+        scheduler.load_from_csv(path)
+    return scheduler
+
+
+def time_gui(scheduler: Scheduler, repeat: int) -> Optional[float]:
+    """Time filling the schedule Treeview, or None when Tk cannot start."""
+    try:
+        import tkinter as tk
+        from python.scheduler_gui import SchedulerGUI
+        root = tk.Tk()
+    except Exception:
+        return None
+    try:
+        root.withdraw()
+        app = SchedulerGUI(root)
+        app.scheduler = scheduler
+
+        def populate():
+            app.display_schedule()
+            root.update_idletasks()
+        return best_time(populate, repeat)
+    finally:
+        root.destroy()
+
+
+def compile_cpp(build_dir: str) -> Optional[str]:
+    """Build cpp/scheduler.cpp with the first compiler found, or return None."""
+    compiler = shutil.which("g++") or shutil.which("clang++")
+    if compiler is None:
+        return None
+    binary = os.path.join(build_dir, "scheduler")
+    source = os.path.join(REPO_ROOT, "cpp", "scheduler.cpp")
+    completed = subprocess.run([compiler, "-std=c++17", "-O2", source, "-o", binary],
+                               capture_output=True)
+    return binary if completed.returncode == 0 else None
+
+
+def time_cli(command: List[str], path: str, repeat: int) -> float:
+    """Time an interactive front end fed: import CSV, ``path``, don't save."""
+    answers = f"1\n{path}\nn\n".encode()
+
+    def run():
+        subprocess.run(command, input=answers, stdout=subprocess.DEVNULL, cwd=REPO_ROOT, check=True)
+    return best_time(run, repeat)
+
+
+def time_headless(path: str, output: str, repeat: int) -> float:
+    """Time the non-interactive generate command, start to exit."""
+    command = [sys.executable, "-m", "python.scheduler", "generate", "--input", path, "--output", output,
+               "--seed", "0"]
+
+    def run():
+        subprocess.run(command, stderr=subprocess.DEVNULL, cwd=REPO_ROOT, check=True)
+    return best_time(run, repeat)
+
+
+def run_case(path: str, repeat: int, cpp_binary: Optional[str], scratch: str) -> Dict[str, Optional[float]]:
+    timings: Dict[str, Optional[float]] = {}
+    timings["validate"] = best_time(lambda: Scheduler().validate_csv_format(path), repeat)
+    timings["load"] = best_time(lambda: loaded_scheduler(path), repeat)
+
+    scheduler = loaded_scheduler(path)
+    timings["generate"] = best_time(lambda: scheduler.generate_schedule(seed=0), repeat)
+    output = os.path.join(scratch, "saved.csv")
+    timings["save"] = best_time(lambda: scheduler.save_to_csv(output), repeat)
+    timings["gui"] = time_gui(scheduler, repeat)
+
+    timings["python_cli"] = time_cli([sys.executable, "-m", "python.scheduler"], path, repeat)
+    timings["headless"] = time_headless(path, os.path.join(scratch, "schedule.csv"), repeat)
+    timings["cpp_cli"] = time_cli([cpp_binary], path, repeat) if cpp_binary else None
+    return timings
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(results: List[dict], baseline_path: str, threshold: float) -> List[str]:
+    """Describe every phase that is more than ``threshold`` slower than the baseline."""
+    with open(baseline_path) as file:
+        baseline = {(r["employees"], r["skew"], r["phase"]): r["seconds"] for r in json.load(file)["results"]}
+    regressions = []
+    for result in results:
+        before = baseline.get((result["employees"], result["skew"], result["phase"]))
+        if before and result["seconds"] and result["seconds"] > before * (1 + threshold):
+            regressions.append(f"{result['phase']} ({result['employees']} employees, skew {result['skew']}): "
+                               f"{before * 1000:.1f} ms -> {result['seconds'] * 1000:.1f} ms")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Time the scheduler hot paths on synthetic rosters.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--skews", type=float, nargs="+", default=[1 / 3, 1.0],
+                        help="share of preferences for Morning (1 = everyone wants Morning)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before flagging, 0.2 = 20%%")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as scratch:
+        cpp_binary = compile_cpp(scratch)
+        if cpp_binary is None:
+            print("No C++ compiler found (or the build failed); skipping cpp_cli.")
+        for size in args.sizes:
+            for skew in args.skews:
+                path = os.path.join(scratch, f"roster_{size}_{skew:g}.csv")
+                write_roster(path, size, skew=skew)
+                timings = run_case(path, args.repeat, cpp_binary, scratch)
+                for phase, seconds in timings.items():
+                    results.append({"employees": size, "skew": skew, "phase": phase, "seconds": seconds})
+                    shown = f"{seconds * 1000:10.1f} ms" if seconds is not None else "   skipped"
+                    print(f"{size:>8} employees  skew {skew:4.2f}  {phase:<11}{shown}")
+
+    with open(args.output, 'w') as file:
+        json.dump({
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "results": results,
+        }, file, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
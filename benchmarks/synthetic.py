@@ -0,0 +1,54 @@
+"""Synthetic preference CSVs for benchmarks.
+
+Rosters are written in the same format as employee_schedule.csv. ``skew``
+is the share of preferences that go to Morning, with the rest split evenly
+between Afternoon and Evening; ``skew=1`` is the everyone-wants-Morning case.
+``off_rate`` is the share of days marked N.
+
+Run from the repository root to write a file:
+    python -m benchmarks.synthetic roster.csv --employees 100000 --skew 0.9
+"""
+import argparse
+import csv
+import random
+from typing import List, Optional
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def preference_codes(rng: random.Random, skew: float, off_rate: float) -> List[str]:
+    """One week of shift codes for one employee."""
+    codes = []
+    for _ in DAYS:
+        if rng.random() < off_rate:
+            codes.append('N')
+        elif rng.random() < skew:
+            codes.append('M')
+        else:
+            codes.append(rng.choice('AE'))
+    return codes
+
+
+def write_roster(path: str, employees: int, skew: float = 1 / 3, off_rate: float = 0.4, seed: int = 0):
+    """Write a preference CSV with ``employees`` rows."""
+    rng = random.Random(seed)
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['Name'] + DAYS)
+        for i in range(employees):
+            writer.writerow([f"Employee{i}"] + preference_codes(rng, skew, off_rate))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Write a synthetic preference CSV.")
+    parser.add_argument("path")
+    parser.add_argument("--employees", type=int, default=1000)
+    parser.add_argument("--skew", type=float, default=1 / 3, help="share of preferences for Morning")
+    parser.add_argument("--off-rate", type=float, default=0.4, help="share of days marked N")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    write_roster(args.path, args.employees, args.skew, args.off_rate, args.seed)
+
+
+if __name__ == "__main__":
+    main()
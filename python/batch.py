@@ -0,0 +1,268 @@
+"""Generate schedules for many preference files in parallel.
+
+Each input CSV (one site or one week) becomes a job that runs in its own
+worker process: load, generate, and write ``<name>_schedule.csv`` to the
+output directory as soon as that job finishes. A job's random choices are
+seeded from the base seed and the file name, so reruns give the same
+schedules no matter how jobs are spread over workers. Files with the same
+name in different directories are told apart by their parent directories,
+e.g. ``north__site_schedule.csv`` and ``south__site_schedule.csv``. A file that fails
+validation is reported with the validator's message and the rest of the
+batch carries on.
+
+Run from the repository root:
+    python -m python.batch test/ --output-dir schedules --workers 4 --seed 42
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+from python.scheduler import Scheduler, CSVFormatError, STRATEGY_NAMES, make_strategy
+
+
+@dataclass
+class JobResult:
+    """Outcome of one input file."""
+    source: str
+    output: Optional[str]
+    seed: int
+    ok: bool
+    error: str = ""
+    warnings: List[str] = field(default_factory=list)
+    employees: int = 0
+    shortfall: int = 0  # places no schedule can fill, from the feasibility check
+    stats: Optional[Dict[str, Any]] = None  # SchedulerStats.as_dict() when requested
+    load_seconds: float = 0.0
+    generate_seconds: float = 0.0
+    write_seconds: float = 0.0
+
+    @property
+    def total_seconds(self) -> float:
+        return self.load_seconds + self.generate_seconds + self.write_seconds
+
+
+@dataclass
+class BatchReport:
+    """All job results plus the wall-clock time of the batch."""
+    results: List[JobResult]
+    wall_seconds: float
+
+    @property
+    def failed(self) -> List[JobResult]:
+        return [result for result in self.results if not result.ok]
+
+    @property
+    def jobs_per_second(self) -> float:
+        return len(self.results) / self.wall_seconds if self.wall_seconds else 0.0
+
+    @property
+    def employees_per_second(self) -> float:
+        employees = sum(result.employees for result in self.results)
+        return employees / self.wall_seconds if self.wall_seconds else 0.0
+
+
+def collect_inputs(paths: List[str]) -> List[str]:
+    """Expand directories into the CSV files they contain, in name order.
+
+    A file named more than once (directly or through a directory) is kept
+    once, at its first position.
+    """
+    inputs = []
+    seen = set()
+    for path in paths:
+        if os.path.isdir(path):
+            found = [os.path.join(path, name) for name in sorted(os.listdir(path))
+                     if name.lower().endswith('.csv')]
+        else:
+            found = [path]
+        for source in found:
+            real = os.path.normcase(os.path.realpath(source))
+            if real not in seen:
+                seen.add(real)
+                inputs.append(source)
+    return inputs
+
+
+def _output_stem(key: str) -> str:
+    return os.path.splitext(key)[0].replace("/", "__")
+
+
+def job_keys(sources: List[str]) -> List[str]:
+    """A distinct key per input, from which its seed and output name are made.
+
+    The key is the file name, e.g. ``site.csv``. Inputs that would share an
+    output name get as many parent directories as it takes to tell them
+    apart, e.g. ``north/site.csv`` and ``south/site.csv``. Raises ValueError
+    when two inputs cannot be told apart.
+    """
+    parts = [os.path.abspath(source).split(os.sep) for source in sources]
+    depth = [1] * len(sources)
+    while True:
+        keys = ["/".join(path[-n:]) for path, n in zip(parts, depth)]
+        groups = defaultdict(list)
+        for i, key in enumerate(keys):
+            # Compared without case, as case-insensitive file systems would.
+            groups[_output_stem(key).casefold()].append(i)
+        clashes = [group for group in groups.values() if len(group) > 1]
+        if not clashes:
+            return keys
+        for group in clashes:
+            deeper = [i for i in group if depth[i] < len(parts[i]) - 1]
+            if not deeper:
+                raise ValueError(f"Inputs {', '.join(sources[i] for i in group)} "
+                                 f"would write the same schedule file.")
+            for i in deeper:
+                depth[i] += 1
+
+
+def job_seed(base_seed: int, key: str) -> int:
+    """Seed for one job, stable across runs, processes and worker counts."""
+    digest = hashlib.sha256(f"{base_seed}:{key}".encode()).digest()
+    return int.from_bytes(digest[:8], 'little')
+
+
+def output_path(key: str, output_dir: str) -> str:
+    return os.path.join(output_dir, f"{_output_stem(key)}_schedule.csv")
+
+
+def run_job(source: str, output: str, seed: int, strategy: str = "greedy",
+            demand: Optional[str] = None, skip_infeasible: bool = False,
+            collect_stats: bool = False) -> JobResult:
+    """Load, check, generate and save one schedule. Never raises."""
+    result = JobResult(source=source, output=None, seed=seed, ok=False)
+    captured = io.StringIO()
+    scheduler = None
+    try:
+        scheduler = Scheduler()
+        if collect_stats:
+            scheduler.enable_stats()
+        if demand is not None:
+            with contextlib.redirect_stdout(captured):
+                loaded = scheduler.load_demand_csv(demand)
+            if not loaded:
+                result.error = captured.getvalue().strip()
+                return result
+        started = time.perf_counter()
+        result.employees = scheduler.append_from_csv(source)
+        result.load_seconds = time.perf_counter() - started
+
+        feasibility = scheduler.check_feasibility()
+        result.shortfall = feasibility.shortfall
+        if not feasibility.feasible:
+            problems = [f"Infeasible: {problem}" for problem in feasibility.problems()]
+            if skip_infeasible:
+                result.error = "\n".join(problems)
+                return result
+            print("\n".join(problems), file=captured)
+
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(captured):
+            scheduler.generate_schedule(make_strategy(strategy), seed=seed)
+        result.generate_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        scheduler.save_schedule_to_csv(output)
+        result.write_seconds = time.perf_counter() - started
+        result.output = output
+        result.ok = True
+    except CSVFormatError as e:
+        result.error = str(e)
+    except Exception as e:
+        result.error = f"Error processing CSV file: {str(e)}"
+    if scheduler is not None and scheduler.stats is not None:
+        result.stats = scheduler.stats.as_dict()
+    result.warnings = captured.getvalue().splitlines()
+    return result
+
+
+def iter_batch(sources: List[str], output_dir: str, workers: Optional[int] = None,
+               seed: int = 0, strategy: str = "greedy", demand: Optional[str] = None,
+               skip_infeasible: bool = False, collect_stats: bool = False) -> Iterator[JobResult]:
+    """Run every job on a process pool and yield results as they finish.
+
+    Raises ValueError, before any job starts, if two sources would write the
+    same schedule file.
+    """
+    keys = job_keys(sources)
+    os.makedirs(output_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(run_job, source, output_path(key, output_dir), job_seed(seed, key),
+                        strategy, demand, skip_infeasible, collect_stats)
+            for source, key in zip(sources, keys)
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def run_batch(sources: List[str], output_dir: str, workers: Optional[int] = None,
+              seed: int = 0, strategy: str = "greedy", progress=None,
+              demand: Optional[str] = None, skip_infeasible: bool = False,
+              collect_stats: bool = False) -> BatchReport:
+    """Run a whole batch; ``progress`` is called with each JobResult as it arrives."""
+    started = time.perf_counter()
+    results = []
+    for result in iter_batch(sources, output_dir, workers, seed, strategy, demand, skip_infeasible,
+                             collect_stats):
+        results.append(result)
+        if progress is not None:
+            progress(result)
+    return BatchReport(results=results, wall_seconds=time.perf_counter() - started)
+
+
+def print_result(result: JobResult):
+    if result.ok:
+        print(f"OK     {result.source} -> {result.output} "
+              f"({result.employees} employees, load {result.load_seconds * 1000:.1f} ms, "
+              f"generate {result.generate_seconds * 1000:.1f} ms, "
+              f"write {result.write_seconds * 1000:.1f} ms)")
+        for warning in result.warnings:
+            print(f"       {warning}")
+    else:
+        print(f"FAILED {result.source}")
+        for line in result.error.splitlines():
+            print(f"       {line}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate schedules for many preference CSVs in parallel.")
+    parser.add_argument("inputs", nargs="+", help="preference CSV files or directories of them")
+    parser.add_argument("--output-dir", default="schedules", help="where to write <name>_schedule.csv files")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=0, help="base seed for the per-job random seeds")
+    parser.add_argument("--strategy", choices=STRATEGY_NAMES, default="greedy")
+    parser.add_argument("--demand", help="CSV of required headcount per shift and day (default: 2 everywhere)")
+    parser.add_argument("--skip-infeasible", action="store_true",
+                        help="fail jobs whose demand cannot be met instead of generating a partial schedule")
+    parser.add_argument("--stats", help="append per-job phase timings and counters to this JSON-lines file")
+    args = parser.parse_args(argv)
+
+    sources = collect_inputs(args.inputs)
+    try:
+        job_keys(sources)
+    except ValueError as e:
+        parser.error(str(e))
+    report = run_batch(sources, args.output_dir, args.workers, args.seed, args.strategy,
+                       progress=print_result, demand=args.demand, skip_infeasible=args.skip_infeasible,
+                       collect_stats=args.stats is not None)
+    if args.stats:
+        with open(args.stats, 'a') as file:
+            for result in report.results:
+                file.write(json.dumps({"source": result.source, "ok": result.ok, **(result.stats or {})}) + "\n")
+    print(f"\n{len(report.results)} jobs, {len(report.failed)} failed, "
+          f"{report.wall_seconds:.2f} s wall, {report.jobs_per_second:.1f} jobs/s, "
+          f"{report.employees_per_second:.0f} employees/s")
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""Content-addressed cache of generated schedules.
+
+A schedule is fully determined by the roster (names and preferences, in
+order), the coverage rules (days, shifts, demand table, weekly maximum), the
+strategy and the seed. The cache key is a hash of all of them; the roster part
+comes from Roster.fingerprint(), which keeps a hash per employee so editing
+one employee only rehashes that employee. Unseeded runs are random and are
+never cached.
+
+Entries live in an in-memory LRU and, when a directory is given, on disk as
+one file per key. Disk files are touched on every hit, and the least recently
+used are deleted once the directory grows past ``max_disk_bytes``.
+
+Usage:
+    cache = ScheduleCache("~/.cache/scheduler")
+    report = cache.generate(scheduler, seed=42)   # a hit applies the stored schedule
+"""
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from python.scheduler import (Scheduler, SchedulingStrategy, GenerationReport, Shift,
+                              BYTE_SHIFTS, SHIFT_BYTES)
+
+FORMAT_VERSION = 1
+SUFFIX = ".schedule"
+
+
+@dataclass
+class CacheEntry:
+    """One generated schedule, as produced from a cleared roster."""
+    assignments: bytes
+    days_worked: bytes  # array('H').tobytes()
+    schedule: Dict[str, Dict[Shift, List[str]]]
+    report: GenerationReport
+
+    def to_bytes(self) -> bytes:
+        header = json.dumps({
+            "version": FORMAT_VERSION,
+            "assignments": len(self.assignments),
+            "days_worked": len(self.days_worked),
+            "schedule": {day: {chr(SHIFT_BYTES[shift]): names for shift, names in shifts.items()}
+                         for day, shifts in self.schedule.items()},
+            "runs": self.report.runs,
+            "best_seed": self.report.best_seed,
+            "best_score": self.report.best_score,
+        }).encode()
+        return header + b"\n" + self.assignments + self.days_worked
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'CacheEntry':
+        end = data.index(b"\n")
+        header = json.loads(data[:end])
+        if header["version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported cache entry version {header['version']}")
+        start = end + 1
+        middle = start + header["assignments"]
+        if len(data) != middle + header["days_worked"]:
+            raise ValueError("Cache entry is truncated")
+        schedule = {day: {BYTE_SHIFTS[ord(code)]: names for code, names in shifts.items()}
+                    for day, shifts in header["schedule"].items()}
+        report = GenerationReport(runs=[tuple(run) for run in header["runs"]],
+                                  best_seed=header["best_seed"], best_score=header["best_score"])
+        return cls(data[start:middle], data[middle:], schedule, report)
+
+
+def cache_key(scheduler: Scheduler, strategy: SchedulingStrategy, seed: Optional[int],
+              restarts: int = 1) -> Optional[str]:
+    """Hex key for generating ``scheduler`` with these settings, or None if unseeded."""
+    if seed is None:
+        return None
+    rules = json.dumps({
+        "days": scheduler.days,
+        "shifts": [shift.value for shift in scheduler.shifts],
+        "demand": [[scheduler.demand[day][shift] for shift in scheduler.shifts] for day in scheduler.days],
+        "max_days": scheduler.max_days,
+        "strategy": f"{type(strategy).__module__}.{type(strategy).__qualname__}:{strategy.name}",
+        "seed": seed,
+        "restarts": max(restarts, 1),
+    }, sort_keys=True).encode()
+    return hashlib.blake2b(scheduler.roster.fingerprint() + rules, digest_size=20).hexdigest()
+
+
+class ScheduleCache:
+    """Two-tier cache of generated schedules: memory LRU, then optional disk."""
+
+    def __init__(self, directory: Optional[str] = None, max_entries: int = 64,
+                 max_disk_bytes: int = 256 * 1024 * 1024):
+        self.directory = os.path.expanduser(directory) if directory else None
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return entry
+        if self.directory:
+            path = self._path(key)
+            try:
+                with open(path, 'rb') as file:
+                    entry = CacheEntry.from_bytes(file.read())
+                os.utime(path)
+            except FileNotFoundError:
+                entry = None
+            except (ValueError, KeyError, OSError):
+                entry = None  # unreadable or from another version; it will be rewritten
+            if entry is not None:
+                self._remember(key, entry)
+                self.hits += 1
+                self.disk_hits += 1
+                return entry
+        self.misses += 1
+        return None
+
+    def put(self, key: str, entry: CacheEntry):
+        self._remember(key, entry)
+        if self.directory:
+            # Write to a temporary file and rename, so readers never see half an entry.
+            handle, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(handle, 'wb') as file:
+                file.write(entry.to_bytes())
+            os.replace(temporary, self._path(key))
+            self._evict_disk()
+
+    def _remember(self, key: str, entry: CacheEntry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(SUFFIX):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        self._memory.clear()
+        if self.directory:
+            for name in os.listdir(self.directory):
+                if name.endswith(SUFFIX):
+                    os.remove(os.path.join(self.directory, name))
+
+    def generate(self, scheduler: Scheduler, strategy: Optional[SchedulingStrategy] = None,
+                 seed: Optional[int] = None, restarts: int = 1, workers: int = 1) -> GenerationReport:
+        """scheduler.generate_schedule with the same arguments, served from the cache when possible."""
+        strategy = strategy or scheduler.strategy
+        key = cache_key(scheduler, strategy, seed, restarts)
+        entry = self.get(key) if key is not None else None
+        if entry is None:
+            report = scheduler.generate_schedule(strategy, seed=seed, restarts=restarts, workers=workers)
+            if key is not None:
+                self.put(key, CacheEntry(
+                    bytes(scheduler.roster.assignments), scheduler.roster.days_worked.tobytes(),
+                    {day: {shift: list(names) for shift, names in shifts.items()}
+                     for day, shifts in scheduler.schedule.items()},
+                    report))
+            return report
+
+        scheduler.reset_schedule()
+        scheduler.apply_schedule(entry.assignments, entry.days_worked,
+                                 {day: {shift: list(names) for shift, names in shifts.items()}
+                                  for day, shifts in entry.schedule.items()},
+                                 entry.report.best_seed)
+        return GenerationReport(runs=list(entry.report.runs), best_seed=entry.report.best_seed,
+                                best_score=entry.report.best_score)
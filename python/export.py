@@ -0,0 +1,195 @@
+"""Export the generated schedule, one record per assigned shift.
+
+Formats:
+    csv     header, then employee,day,shift rows (the "long" layout)
+    jsonl   one {"employee": ..., "day": ..., "shift": ...} object per line
+    binary  b"SCHR", a version byte and the day names, then one record per
+            shift: name length (u16), UTF-8 name, day index, shift code byte
+
+Records are read straight from the roster's packed assignment matrix, in
+employee order, and written through a large buffer a chunk at a time, so
+memory use does not grow with the roster. export_per_day writes one file per
+day and can spread the days over worker processes.
+
+Usage:
+    export_schedule(scheduler, "schedule.jsonl", "jsonl")
+    export_per_day(scheduler, "schedules/", "csv", workers=7)
+"""
+import csv
+import json
+import os
+import sys
+from typing import BinaryIO, Iterator, List, Optional, Sequence, TextIO, Tuple, Union
+
+from python.scheduler import Scheduler, Shift, BYTE_SHIFTS, WORKED_TABLE
+
+FORMATS = ["csv", "jsonl", "binary"]
+EXTENSIONS = {"csv": "csv", "jsonl": "jsonl", "binary": "bin"}
+BINARY_MAGIC = b"SCHR"
+BINARY_VERSION = 1
+BUFFER_SIZE = 1 << 20
+CHUNK = 8192  # records formatted per write
+
+Destination = Union[str, os.PathLike, TextIO, BinaryIO]
+
+
+def iter_assigned(names: Sequence[str], assignments: bytes, width: int,
+                  day_indexes: Optional[Sequence[int]] = None) -> Iterator[Tuple[str, int, int]]:
+    """Yield (name, day index, shift code byte) for every assigned cell, in roster order."""
+    if day_indexes is None:
+        worked = assignments.translate(WORKED_TABLE)
+        cell = worked.find(1)
+        while cell >= 0:
+            row, d = divmod(cell, width)
+            yield names[row], d, assignments[cell]
+            cell = worked.find(1, cell + 1)
+        return
+    for d in day_indexes:
+        column = assignments[d::width]
+        worked = column.translate(WORKED_TABLE)
+        row = worked.find(1)
+        while row >= 0:
+            yield names[row], d, column[row]
+            row = worked.find(1, row + 1)
+
+
+def _chunks(records: Iterator, size: int = CHUNK) -> Iterator[list]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def write_csv(file: TextIO, records: Iterator[Tuple[str, int, int]], days: List[str]):
+    shift_names = {code: shift.value for code, shift in BYTE_SHIFTS.items()}
+    writer = csv.writer(file)
+    writer.writerow(["employee", "day", "shift"])
+    for chunk in _chunks(records):
+        writer.writerows((name, days[d], shift_names[code]) for name, d, code in chunk)
+
+
+def write_jsonl(file: TextIO, records: Iterator[Tuple[str, int, int]], days: List[str]):
+    # Everything after the name is fixed per (day, shift), so format it once.
+    tails = {(d, code): f', "day": {json.dumps(day)}, "shift": {json.dumps(shift.value)}}}\n'
+             for d, day in enumerate(days) for code, shift in BYTE_SHIFTS.items()}
+    for chunk in _chunks(records):
+        file.write("".join(f'{{"employee": {json.dumps(name)}{tails[(d, code)]}'
+                           for name, d, code in chunk))
+
+
+def write_binary(file: BinaryIO, records: Iterator[Tuple[str, int, int]], days: List[str]):
+    header = bytearray(BINARY_MAGIC)
+    header += bytes([BINARY_VERSION, len(days)])
+    for day in days:
+        encoded = day.encode()
+        header += bytes([len(encoded)]) + encoded
+    file.write(header)
+    for chunk in _chunks(records):
+        out = bytearray()
+        for name, d, code in chunk:
+            encoded = name.encode()
+            if len(encoded) > 0xFFFF:
+                raise ValueError(f"Employee name is too long for the binary format: {name[:40]}...")
+            out += len(encoded).to_bytes(2, 'little')
+            out += encoded
+            out.append(d)
+            out.append(code)
+        file.write(out)
+
+
+def read_binary(source: Union[str, os.PathLike, BinaryIO]) -> Iterator[Tuple[str, str, Shift]]:
+    """Yield (employee, day, shift) records from a file written in the binary format."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb', buffering=BUFFER_SIZE) as file:
+            yield from read_binary(file)
+        return
+    file = source
+    header = file.read(6)
+    if len(header) < 6 or header[:4] != BINARY_MAGIC:
+        raise ValueError("Not a schedule export: bad magic bytes.")
+    if header[4] != BINARY_VERSION:
+        raise ValueError(f"Unsupported schedule export version {header[4]}.")
+    days = []
+    for _ in range(header[5]):
+        length = file.read(1)[0]
+        days.append(file.read(length).decode())
+    while True:
+        prefix = file.read(2)
+        if not prefix:
+            return
+        length = int.from_bytes(prefix, 'little')
+        record = file.read(length + 2)
+        if len(prefix) < 2 or len(record) < length + 2:
+            raise ValueError("Schedule export is truncated.")
+        yield record[:length].decode(), days[record[length]], BYTE_SHIFTS[record[length + 1]]
+
+
+_WRITERS = {"csv": write_csv, "jsonl": write_jsonl, "binary": write_binary}
+
+
+def _write(destination: Destination, fmt: str, records: Iterator[Tuple[str, int, int]], days: List[str]):
+    if fmt not in _WRITERS:
+        raise ValueError(f"Unknown export format '{fmt}'. Expected one of: {', '.join(FORMATS)}.")
+    binary = fmt == "binary"
+    if destination == "-":
+        destination = sys.stdout.buffer if binary else sys.stdout
+    if isinstance(destination, (str, os.PathLike)):
+        if binary:
+            with open(destination, 'wb', buffering=BUFFER_SIZE) as file:
+                write_binary(file, records, days)
+        else:
+            with open(destination, 'w', newline='', encoding='utf-8', buffering=BUFFER_SIZE) as file:
+                _WRITERS[fmt](file, records, days)
+    else:
+        _WRITERS[fmt](destination, records, days)
+        destination.flush()
+
+
+def export_schedule(scheduler: Scheduler, destination: Destination, fmt: str = "csv"):
+    """Write every assigned shift to a path, '-' for stdout, or an open file."""
+    roster = scheduler.roster
+    _write(destination, fmt, iter_assigned(roster.names, bytes(roster.assignments), roster.width),
+           scheduler.days)
+
+
+def day_path(directory: str, day: str, fmt: str, prefix: str = "schedule_") -> str:
+    return os.path.join(directory, f"{prefix}{day}.{EXTENSIONS[fmt]}")
+
+
+_day_state = None
+
+
+def _init_day_worker(state):
+    global _day_state
+    _day_state = state
+
+
+def _write_day(state, d: int, path: str, fmt: str) -> str:
+    days, names, assignments = state
+    _write(path, fmt, iter_assigned(names, assignments, len(days), [d]), days)
+    return path
+
+
+def _export_day(d: int, path: str, fmt: str) -> str:
+    return _write_day(_day_state, d, path, fmt)
+
+
+def export_per_day(scheduler: Scheduler, directory: str, fmt: str = "csv",
+                   workers: int = 1, prefix: str = "schedule_") -> List[str]:
+    """Write one file per day to ``directory`` and return their paths in day order.
+
+    With ``workers`` > 1 the days are written by that many processes, each
+    given the names and assignment matrix once.
+    """
+    os.makedirs(directory, exist_ok=True)
+    state = (scheduler.days, scheduler.roster.names, bytes(scheduler.roster.assignments))
+    paths = [day_path(directory, day, fmt, prefix) for day in scheduler.days]
+    if workers <= 1:
+        return [_write_day(state, d, path, fmt) for d, path in enumerate(paths)]
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_day_worker, initargs=(state,)) as pool:
+        return list(pool.map(_export_day, range(len(paths)), paths, [fmt] * len(paths)))
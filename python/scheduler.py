@@ -1,9 +1,19 @@
+import heapq
+import operator
 import random
-from typing import List, Dict, Set
-from dataclasses import dataclass
+from array import array
+from itertools import accumulate, compress, repeat
+from collections.abc import MutableMapping, Sequence
+from typing import Any, Callable, List, Dict, Set, Iterable, Iterator, Optional, Tuple, TextIO, Union
+from dataclasses import dataclass, field
 from enum import Enum
+import contextlib
 import csv
+import functools
 import os
+import sys
+import threading
+import time
 
 class Shift(Enum):
     MORNING = "Morning"
@@ -31,6 +41,40 @@ class Shift(Enum):
         }
         return code_map.get(shift, 'N')
 
+_SHIFT_CODES = {code: Shift.from_code(code) for code in ['M', 'A', 'E', 'N']}
+
+# Byte values of the shift codes, as stored in Roster arrays.
+SHIFT_BYTES = {shift: ord(Shift.to_code(shift)) for shift in Shift}
+BYTE_SHIFTS = {code: shift for shift, code in SHIFT_BYTES.items()}
+NO_SHIFT_BYTE = SHIFT_BYTES[Shift.NO_SHIFT]
+
+MIN_COVERAGE = 2  # employees required on every shift
+MAX_DAYS_PER_WEEK = 5  # shifts one employee may work in a week
+CANCEL_CHECK_ROWS = 4096  # rows between cancellation checks in per-row loops
+HARD_PENALTY = 1_000_000  # score of one uncovered place or rule violation
+
+# bytes.translate tables used by evaluate_assignments.
+WORKED_TABLE = bytes(0 if code == NO_SHIFT_BYTE else 1 for code in range(256))
+_ASSIGNED_TABLE = bytes(0 if code == NO_SHIFT_BYTE else code for code in range(256))
+# One per shift code, used to build the availability index in bulk.
+_SHIFT_FLAG_TABLES = {code: bytes(1 if byte == code else 0 for byte in range(256)) for code in b"MAE"}
+
+# Bytes per employee in Roster.digests.
+_DIGEST_SIZE = 16
+
+# Anything iter_csv_preferences can read from: a path, an open file or lines.
+CSVSource = Union[str, os.PathLike, TextIO, Iterable[str]]
+
+class CSVFormatError(ValueError):
+    """Raised when a preference CSV does not follow the required format."""
+
+class JobCancelled(Exception):
+    """Raised by Scheduler.check_cancelled once the scheduler's cancel_event is set.
+
+    A cancelled append_from_csv leaves the roster as it was; a cancelled
+    generate_schedule leaves the schedule part-way done.
+    """
+
 @dataclass
 class Employee:
     name: str
@@ -42,107 +86,800 @@ class Employee:
         if self.assigned_shifts is None:
             self.assigned_shifts = {}
 
-class Scheduler:
+@dataclass
+class ScheduleEvaluation:
+    """Coverage, workload and preference figures for one assignment matrix."""
+    coverage: Dict[str, Dict[Shift, int]]  # day -> shift -> employees assigned
+    deficits: Dict[str, Dict[Shift, int]]  # day -> shift -> employees missing, only where short
+    days_worked: bytes  # days worked per roster row
+    assignments: int
+    preferred_assignments: int
+    over_cap_rows: List[int]  # rows working more than the weekly maximum
+    double_bookings: int = 0  # schedule entries beyond one shift per employee per day
+
+    @property
+    def total_deficit(self) -> int:
+        return sum(missing for shifts in self.deficits.values() for missing in shifts.values())
+
+    @property
+    def preference_rate(self) -> float:
+        """Share of assigned shifts that match the employee's preference."""
+        if not self.assignments:
+            return 1.0
+        return self.preferred_assignments / self.assignments
+
+    @property
+    def violations(self) -> int:
+        return len(self.over_cap_rows) + self.double_bookings
+
+    @property
+    def is_valid(self) -> bool:
+        return self.total_deficit == 0 and self.violations == 0
+
+    @property
+    def score(self) -> int:
+        """Single figure to minimise: uncovered and illegal first, then unpreferred."""
+        unpreferred = self.assignments - self.preferred_assignments
+        return (self.total_deficit + self.violations) * HARD_PENALTY + unpreferred
+
+_OVER_CAP_TABLES: Dict[int, bytes] = {}
+
+def _over_cap_table(max_days: int) -> bytes:
+    """bytes.translate table flagging day counts above ``max_days``."""
+    table = _OVER_CAP_TABLES.get(max_days)
+    if table is None:
+        table = _OVER_CAP_TABLES[max_days] = bytes(1 if count > max_days else 0 for count in range(256))
+    return table
+
+def evaluate_assignments(assignments: bytes, preferences: bytes, days: List[str],
+                         shifts: List['Shift'], min_coverage: int = MIN_COVERAGE,
+                         max_days: int = MAX_DAYS_PER_WEEK,
+                         demand: Optional[Dict[str, Dict['Shift', int]]] = None) -> ScheduleEvaluation:
+    """Evaluate a packed employees x days assignment matrix.
+
+    Both matrices use the Roster layout. ``demand`` gives the headcount per
+    day and shift; without it every shift needs ``min_coverage``. All work is done with bytes
+    operations (slicing, count, translate) and by adding the day columns as
+    big integers, one byte lane per employee, so the cost per employee is a
+    handful of machine operations rather than Python bytecode.
+    """
+    width = len(days)
+    rows = len(assignments) // width
+    coverage = {}
+    deficits = {}
+    for d, day in enumerate(days):
+        column = assignments[d::width]
+        coverage[day] = {shift: column.count(SHIFT_BYTES[shift]) for shift in shifts}
+        required = demand[day] if demand is not None else dict.fromkeys(shifts, min_coverage)
+        short = {shift: required[shift] - count
+                 for shift, count in coverage[day].items() if count < required[shift]}
+        if short:
+            deficits[day] = short
+
+    # Per-employee day counts: each column holds 0/1 per employee; summing the
+    # columns as little-endian integers adds them lane by lane without carries.
+    worked = assignments.translate(WORKED_TABLE)
+    total = sum(int.from_bytes(worked[d::width], 'little') for d in range(width))
+    days_worked = total.to_bytes(rows, 'little')
+    over_cap_rows = []
+    flags = days_worked.translate(_over_cap_table(max_days))
+    row = flags.find(1)
+    while row >= 0:
+        over_cap_rows.append(row)
+        row = flags.find(1, row + 1)
+
+    # A zero byte in assigned XOR preferred marks an assigned shift that was
+    # the preferred one; unassigned cells were mapped to 0 and never match.
+    assigned = assignments.translate(_ASSIGNED_TABLE)
+    matches = (int.from_bytes(assigned, 'little') ^ int.from_bytes(preferences, 'little'))
+    preferred_assignments = matches.to_bytes(len(assigned), 'little').count(0)
+
+    return ScheduleEvaluation(
+        coverage=coverage,
+        deficits=deficits,
+        days_worked=days_worked,
+        assignments=len(assignments) - assignments.count(NO_SHIFT_BYTE),
+        preferred_assignments=preferred_assignments,
+        over_cap_rows=over_cap_rows,
+    )
+
+@dataclass
+class SchedulerStats:
+    """Phase timings and counters, collected while a Scheduler's ``stats`` is set.
+
+    After each phase a record (phase, seconds and the counters so far) is
+    passed to ``callback`` and written as one JSON line to ``sink``, when given.
+    """
+    timings: Dict[str, float] = field(default_factory=dict)  # phase -> seconds, summed over calls
+    calls: Dict[str, int] = field(default_factory=dict)  # phase -> times run
+    candidate_scans: int = 0  # availability index lookups made to fill a slot
+    random_fills: int = 0  # employees picked at random to fill a slot
+    assignments: int = 0  # shifts assigned, including by improve and repairs
+    uncovered_slots: int = 0  # slots left short after generate_schedule
+    callback: Optional[Callable[[Dict[str, Any]], None]] = field(default=None, repr=False, compare=False)
+    sink: Optional[TextIO] = field(default=None, repr=False, compare=False)
+
+    def counters(self) -> Dict[str, int]:
+        return {
+            "candidate_scans": self.candidate_scans,
+            "random_fills": self.random_fills,
+            "assignments": self.assignments,
+            "uncovered_slots": self.uncovered_slots,
+        }
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"timings": dict(self.timings), "calls": dict(self.calls), **self.counters()}
+
+    def record(self, phase: str, seconds: float):
+        self.timings[phase] = self.timings.get(phase, 0.0) + seconds
+        self.calls[phase] = self.calls.get(phase, 0) + 1
+        if self.callback is None and self.sink is None:
+            return
+        entry = {"phase": phase, "seconds": seconds, **self.counters()}
+        if self.callback is not None:
+            self.callback(entry)
+        if self.sink is not None:
+            import json
+            self.sink.write(json.dumps(entry) + "\n")
+
+def _phase(name: str):
+    """Time the decorated Scheduler method as phase ``name`` when stats are on."""
+    def decorate(method):
+        @functools.wraps(method)
+        def timed(self, *args, **kwargs):
+            stats = self.stats
+            if stats is None:
+                return method(self, *args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                stats.record(name, time.perf_counter() - started)
+        return timed
+    return decorate
+
+@dataclass
+class ImprovementReport:
+    """Outcome of one Scheduler.improve run."""
+    initial_score: int
+    final_score: int
+    moves_tried: int = 0
+    moves_applied: int = 0
+    elapsed: float = 0.0  # seconds
+    trace: List[Tuple[float, int]] = field(default_factory=list)  # (seconds, score) after each gain
+
+    @property
+    def moves_per_second(self) -> float:
+        return self.moves_tried / self.elapsed if self.elapsed else 0.0
+
+@dataclass
+class FeasibilityReport:
+    """Upper bounds on what any schedule can cover, from Scheduler.check_feasibility."""
+    demand: int  # places still to fill
+    capacity: int  # employee-days still available under the weekly maximum
+    shortfall: int  # places no schedule can fill
+    blocking_days: List[str]  # days whose combined demand exceeds what employees can supply
+    day_shortfalls: Dict[str, int]  # day -> places short even with everyone free that day working
+    unpreferred: Dict[str, Dict[Shift, int]]  # day -> shift -> places too few employees prefer
+
+    @property
+    def feasible(self) -> bool:
+        return self.shortfall == 0
+
+    def problems(self) -> List[str]:
+        """One line per coverage problem, empty when the demand can be met."""
+        lines = []
+        if self.capacity < self.demand:
+            lines.append(f"{self.demand} places to fill but only {self.capacity} employee-days available")
+        for day, short in self.day_shortfalls.items():
+            lines.append(f"{day}: {short} more employees needed than are available")
+        if self.shortfall and not lines:
+            lines.append(f"{', '.join(self.blocking_days)}: {self.shortfall} places cannot be filled "
+                         f"within the weekly maximum")
+        return lines
+
+class Roster:
+    """Columnar employee store: a name table plus packed per-day shift codes.
+
+    Employee ``row`` owns bytes ``row * 7`` to ``row * 7 + 6`` of
+    ``preferences`` and ``assignments``, one M/A/E/N code per day of the week,
+    and entry ``row`` of ``days_worked``. Only one preferred shift per day is
+    kept, which is all the CSV and manual entry paths can produce.
+
+    ``digests`` holds a 16-byte hash of each row's name and preferences. It
+    is built on the first fingerprint() call and kept up to date by the
+    methods below from then on, so an edit rehashes one employee only.
+    """
+
+    def __init__(self, days: List[str]):
+        self.days = days
+        self.width = len(days)
+        self.names: List[str] = []
+        self.preferences = bytearray()
+        self.assignments = bytearray()
+        self.days_worked = array('H')
+        self.digests: Optional[bytearray] = None
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def append(self, name: str, preferred_shifts: Dict[str, List[Shift]]) -> int:
+        """Add an employee and return their row."""
+        row = len(self.names)
+        self.names.append(name)
+        self.preferences += self.pack(preferred_shifts)
+        self.assignments += bytes([NO_SHIFT_BYTE]) * self.width
+        self.days_worked.append(0)
+        if self.digests is not None:
+            self.digests += self._digest(row)
+        return row
+
+    def truncate(self, count: int):
+        """Drop every row from ``count`` onwards."""
+        del self.names[count:]
+        del self.preferences[count * self.width:]
+        del self.assignments[count * self.width:]
+        del self.days_worked[count:]
+        if self.digests is not None:
+            del self.digests[count * _DIGEST_SIZE:]
+
+    def swap_remove(self, row: int) -> int:
+        """Remove one row by moving the last row into it; returns the last row's old index."""
+        last = len(self.names) - 1
+        if row != last:
+            width = self.width
+            self.names[row] = self.names[last]
+            self.preferences[row * width:(row + 1) * width] = self.preferences[last * width:]
+            self.assignments[row * width:(row + 1) * width] = self.assignments[last * width:]
+            self.days_worked[row] = self.days_worked[last]
+            if self.digests is not None:
+                self.digests[row * _DIGEST_SIZE:(row + 1) * _DIGEST_SIZE] = self.digests[last * _DIGEST_SIZE:]
+        self.truncate(last)
+        return last
+
+    def set_preferences(self, row: int, codes: bytes):
+        """Replace a row's packed preference codes."""
+        self.preferences[row * self.width:(row + 1) * self.width] = codes
+        if self.digests is not None:
+            self.digests[row * _DIGEST_SIZE:(row + 1) * _DIGEST_SIZE] = self._digest(row)
+
+    def _digest(self, row: int) -> bytes:
+        import hashlib
+        codes = self.preferences[row * self.width:(row + 1) * self.width]
+        return hashlib.blake2b(self.names[row].encode() + codes, digest_size=_DIGEST_SIZE).digest()
+
+    def fingerprint(self) -> bytes:
+        """Hash of every name and preference, in roster order."""
+        import hashlib
+        if self.digests is None or len(self.digests) != len(self.names) * _DIGEST_SIZE:
+            self.digests = bytearray().join(self._digest(row) for row in range(len(self.names)))
+        return hashlib.blake2b(self.digests, digest_size=_DIGEST_SIZE).digest()
+
+    def pack(self, shifts_by_day: Dict[str, List[Shift]]) -> bytes:
+        """Pack a day -> [Shift, ...] mapping into one code per day."""
+        return bytes(
+            SHIFT_BYTES[shifts_by_day[day][0]] if shifts_by_day.get(day) else NO_SHIFT_BYTE
+            for day in self.days
+        )
+
+    def preferred_shifts(self, row: int) -> Dict[str, List[Shift]]:
+        """Unpack a row's preferences into the Employee.preferred_shifts form."""
+        codes = self.preferences[row * self.width:(row + 1) * self.width]
+        return {
+            day: [BYTE_SHIFTS[code]]
+            for day, code in zip(self.days, codes) if code != NO_SHIFT_BYTE
+        }
+
+class _AssignedShiftsView(MutableMapping):
+    """day -> Shift mapping backed by one row of Roster.assignments."""
+    __slots__ = ("roster", "row")
+
+    def __init__(self, roster: Roster, row: int):
+        self.roster = roster
+        self.row = row
+
+    def _offset(self, day: str) -> int:
+        try:
+            return self.row * self.roster.width + self.roster.days.index(day)
+        except ValueError:
+            raise KeyError(day) from None
+
+    def __getitem__(self, day: str) -> Shift:
+        code = self.roster.assignments[self._offset(day)]
+        if code == NO_SHIFT_BYTE:
+            raise KeyError(day)
+        return BYTE_SHIFTS[code]
+
+    def __setitem__(self, day: str, shift: Shift):
+        self.roster.assignments[self._offset(day)] = SHIFT_BYTES[shift]
+
+    def __delitem__(self, day: str):
+        offset = self._offset(day)
+        if self.roster.assignments[offset] == NO_SHIFT_BYTE:
+            raise KeyError(day)
+        self.roster.assignments[offset] = NO_SHIFT_BYTE
+
+    def __iter__(self) -> Iterator[str]:
+        base = self.row * self.roster.width
+        codes = self.roster.assignments[base:base + self.roster.width]
+        return iter([day for day, code in zip(self.roster.days, codes) if code != NO_SHIFT_BYTE])
+
+    def __len__(self) -> int:
+        base = self.row * self.roster.width
+        codes = self.roster.assignments[base:base + self.roster.width]
+        return self.roster.width - codes.count(NO_SHIFT_BYTE)
+
+class EmployeeView:
+    """Employee-shaped view of one Roster row, created on demand.
+
+    Exposes the same attributes as Employee so code written against
+    ``Scheduler.employees`` works in compact mode. ``preferred_shifts`` is
+    unpacked on every access; edits to the returned dict are not stored.
+    """
+    __slots__ = ("roster", "row")
+
+    def __init__(self, roster: Roster, row: int):
+        self.roster = roster
+        self.row = row
+
+    @property
+    def name(self) -> str:
+        return self.roster.names[self.row]
+
+    @property
+    def preferred_shifts(self) -> Dict[str, List[Shift]]:
+        return self.roster.preferred_shifts(self.row)
+
+    @property
+    def assigned_shifts(self) -> _AssignedShiftsView:
+        return _AssignedShiftsView(self.roster, self.row)
+
+    @property
+    def days_worked(self) -> int:
+        return self.roster.days_worked[self.row]
+
+    @days_worked.setter
+    def days_worked(self, value: int):
+        self.roster.days_worked[self.row] = value
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, EmployeeView)
+                and other.roster is self.roster and other.row == self.row)
+
+    def __hash__(self) -> int:
+        return hash((id(self.roster), self.row))
+
+    def __repr__(self) -> str:
+        return (f"EmployeeView(name={self.name!r}, preferred_shifts={self.preferred_shifts!r}, "
+                f"assigned_shifts={dict(self.assigned_shifts)!r}, days_worked={self.days_worked!r})")
+
+class _RosterEmployees(Sequence):
+    """Read-only sequence of EmployeeView objects over a Roster."""
+
+    def __init__(self, roster: Roster):
+        self.roster = roster
+
+    def __len__(self) -> int:
+        return len(self.roster)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [EmployeeView(self.roster, row) for row in range(len(self.roster))[index]]
+        if index < 0:
+            index += len(self.roster)
+        if not 0 <= index < len(self.roster):
+            raise IndexError("employee index out of range")
+        return EmployeeView(self.roster, index)
+
+class _IndexedSet:
+    """Set of employee rows with O(1) add, discard and random choice.
+
+    Rows are kept in a packed array so ``rng.choice`` can pick from it
+    directly; removal swaps the last row into the freed position.
+    ``positions`` is indexed by row (-1 when absent), which is far smaller
+    than a dict when most of the roster is in the set.
+    """
+    __slots__ = ("items", "positions")
+
     def __init__(self):
-        self.employees: List[Employee] = []
+        self.items = array('i')
+        self.positions = array('i')
+
+    def add(self, row: int):
+        positions = self.positions
+        if row >= len(positions):
+            positions.extend(array('i', [-1]) * (row + 1 - len(positions)))
+        elif positions[row] >= 0:
+            return
+        positions[row] = len(self.items)
+        self.items.append(row)
+
+    def discard(self, row: int):
+        positions = self.positions
+        if row >= len(positions) or positions[row] < 0:
+            return
+        position = positions[row]
+        positions[row] = -1
+        last = self.items.pop()
+        if position < len(self.items):
+            self.items[position] = last
+            positions[last] = position
+
+    def add_flagged(self, flags: bytes, first_row: int):
+        """Add row ``first_row + i`` for every ``flags[i] == 1``, in bulk.
+
+        For rows new to the set, such as those just appended to the roster.
+        """
+        positions = self.positions
+        if len(positions) < first_row:
+            positions.extend(array('i', [-1]) * (first_row - len(positions)))
+        del positions[first_row:]
+        base = len(self.items)
+        self.items.extend(compress(range(first_row, first_row + len(flags)), flags))
+        # (running count of flagged rows + base) where flagged, else 0; minus one
+        # gives each new row's position in items, or -1.
+        counts = map(operator.add, accumulate(flags), repeat(base))
+        positions.extend(map(operator.sub, map(operator.mul, counts, flags), repeat(1)))
+
+    def move(self, old: int, new: int):
+        """Let row ``new``, which is not in the set, take ``old``'s place."""
+        positions = self.positions
+        if old >= len(positions) or positions[old] < 0:
+            return
+        if new >= len(positions):
+            positions.extend(array('i', [-1]) * (new + 1 - len(positions)))
+        position = positions[old]
+        positions[old] = -1
+        positions[new] = position
+        self.items[position] = new
+
+    def truncate(self, first_row: int):
+        """Remove rows ``first_row`` and up, which must be the last rows added."""
+        positions = self.positions
+        added = len(positions[first_row:]) - positions[first_row:].count(-1)
+        del self.items[len(self.items) - added:]
+        del positions[first_row:]
+
+    def copy(self) -> '_IndexedSet':
+        clone = _IndexedSet()
+        clone.items = array('i', self.items)
+        clone.positions = array('i', self.positions)
+        return clone
+
+    def map_arrays(self, items: memoryview, positions: memoryview):
+        """Use read-only views of 'i' values as the arrays, until the first change.
+
+        Lets processes that map the same snapshot file share the index; see
+        _MappedIndexedSet.
+        """
+        self.items, self.positions = items, positions
+        self.__class__ = _MappedIndexedSet
+
+    def __contains__(self, row: int) -> bool:
+        return row < len(self.positions) and self.positions[row] >= 0
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+class _MappedIndexedSet(_IndexedSet):
+    """_IndexedSet whose arrays are read-only memoryviews, e.g. of a mapped file.
+
+    Reads work on the views directly, and copies share them. The first change
+    copies them into arrays and turns the object back into a plain
+    _IndexedSet, so sets that never change are never copied.
+    """
+    __slots__ = ()
+
+    def _own(self):
+        items, positions = array('i'), array('i')
+        items.frombytes(self.items.cast('B'))
+        positions.frombytes(self.positions.cast('B'))
+        self.items, self.positions = items, positions
+        self.__class__ = _IndexedSet
+
+    def copy(self) -> '_IndexedSet':
+        clone = _IndexedSet()
+        clone.map_arrays(self.items, self.positions)
+        return clone
+
+    def add(self, row: int):
+        if row not in self:
+            self._own()
+            self.add(row)
+
+    def discard(self, row: int):
+        if row in self:
+            self._own()
+            self.discard(row)
+
+    def add_flagged(self, flags: bytes, first_row: int):
+        self._own()
+        self.add_flagged(flags, first_row)
+
+    def move(self, old: int, new: int):
+        if old in self:
+            self._own()
+            self.move(old, new)
+
+    def truncate(self, first_row: int):
+        if len(self.positions) > first_row:
+            self._own()
+            self.truncate(first_row)
+
+@dataclass
+class GenerationReport:
+    """Seeds and scores of the runs behind one generate_schedule call."""
+    runs: List[Tuple[int, int]]  # (seed, score) per run, in run order
+    best_seed: Optional[int]
+    best_score: int
+
+class SchedulingStrategy:
+    """How Scheduler.generate_schedule fills the schedule.
+
+    Subclasses implement ``generate``, which assigns shifts through the
+    scheduler's ``assign_shift`` (or ``_assign_row``) so the roster, the
+    availability index and ``schedule`` stay in step. Long-running strategies
+    should call ``scheduler.check_cancelled()`` now and then so GUI jobs can
+    be cancelled.
+    """
+    name = "base"
+
+    def generate(self, scheduler: 'Scheduler'):
+        raise NotImplementedError
+
+class GreedyStrategy(SchedulingStrategy):
+    """Preferred shifts first, in roster order, then random fill-ins."""
+    name = "greedy"
+
+    def generate(self, scheduler: 'Scheduler'):
+        scheduler.assign_preferred_shifts()
+        scheduler.check_cancelled()
+        scheduler.resolve_conflicts()
+
+class MostConstrainedFirstStrategy(SchedulingStrategy):
+    """Fill the slot with the fewest candidates per open place first."""
+    name = "most-constrained"
+
+    def generate(self, scheduler: 'Scheduler'):
+        scheduler.allocate_most_constrained_first()
+
+STRATEGY_NAMES = ["greedy", "most-constrained", "min-cost-flow"]
+
+def make_strategy(name: str) -> SchedulingStrategy:
+    """Strategy for a command-line name from STRATEGY_NAMES."""
+    if name == "min-cost-flow":
+        from python.solver import MinCostFlowStrategy
+        return MinCostFlowStrategy()
+    if name == "most-constrained":
+        return MostConstrainedFirstStrategy()
+    if name == "greedy":
+        return GreedyStrategy()
+    raise ValueError(f"Unknown strategy '{name}'. Expected one of: {', '.join(STRATEGY_NAMES)}.")
+
+class Scheduler:
+    def __init__(self, compact: bool = False, strategy: Optional[SchedulingStrategy] = None):
         self.days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
         self.shifts = [Shift.MORNING, Shift.AFTERNOON, Shift.EVENING]
         self.schedule: Dict[str, Dict[Shift, List[str]]] = {
             day: {shift: [] for shift in self.shifts} for day in self.days
         }
 
-    def validate_csv_format(self, filename: str) -> tuple[bool, str]:
-        """Validate the CSV file format before processing."""
-        if not os.path.exists(filename):
-            return False, f"Error: File {filename} does not exist."
+        # Preferences, assignments and day counts always live in the roster.
+        # In compact mode no Employee objects are kept at all and
+        # self.employees hands out EmployeeView objects over the roster rows;
+        # otherwise each Employee mirrors its row.
+        self.compact = compact
+        self.min_coverage = MIN_COVERAGE  # default headcount for slots not in a demand table
+        self.max_days = MAX_DAYS_PER_WEEK
+        self.demand: Dict[str, Dict[Shift, int]] = {
+            day: {shift: self.min_coverage for shift in self.shifts} for day in self.days
+        }
+        self.strategy = strategy or GreedyStrategy()
+        self.has_schedule = False  # set by generate_schedule; edits after that repair it
+        self.rng = random  # source of random fill-ins; generate_schedule(seed=...) replaces it
+        self.verbose = True  # print coverage warnings
+        self.stats: Optional[SchedulerStats] = None  # set by enable_stats
+        # Set from another thread to stop loading or generation early; see check_cancelled.
+        self.cancel_event: Optional[threading.Event] = None
+        self._stats_file: Optional[TextIO] = None  # sink opened by enable_stats from a path
+        self.roster = Roster(self.days)
+        self._day_index = {day: i for i, day in enumerate(self.days)}
+        if compact:
+            self.employees: Sequence = _RosterEmployees(self.roster)
+        else:
+            self.employees: List[Employee] = []
+
+        # Availability index, kept up to date by add_employee and assign_shift.
+        # _assignable[day] holds the rows of employees that can still take a
+        # shift on that day; _preferred[day][shift] is the subset of those who
+        # asked for that shift.
+        self._rows: Dict[int, int] = {}  # id(employee) -> position in self.employees
+        self._assignable: Dict[str, _IndexedSet] = {day: _IndexedSet() for day in self.days}
+        self._preferred: Dict[str, Dict[Shift, _IndexedSet]] = {
+            day: {shift: _IndexedSet() for shift in self.shifts} for day in self.days
+        }
+        # True while every set lists its rows in ascending order, as a rebuild
+        # leaves them. Random fill-ins pick by position, so a seed only
+        # reproduces a schedule from that order; reset_schedule restores it.
+        self.index_in_row_order = True
 
+    def iter_csv_preferences(self, source: CSVSource) -> Iterator[Tuple[str, Dict[str, List[Shift]]]]:
+        """Stream (name, preferred_shifts) pairs from a preference CSV.
+
+        ``source`` may be a path, an open text file or any iterable of lines.
+        Each row is validated as it is read; the first problem raises
+        CSVFormatError carrying the same message validate_csv_format returns.
+        Rows before the bad one have already been yielded by then.
+        """
+        if isinstance(source, (str, os.PathLike)):
+            if not os.path.exists(source):
+                raise CSVFormatError(f"Error: File {source} does not exist.")
+            try:
+                file = open(source, 'r', newline='')
+            except Exception as e:
+                raise CSVFormatError(self._csv_exception_message(e)) from e
+            with file:
+                yield from self._parse_csv_lines(file)
+        else:
+            yield from self._parse_csv_lines(source)
+
+    @staticmethod
+    def _csv_exception_message(error: Exception) -> str:
+        return f"Error: The input CSV file cannot be used because it does not follow the required format.\n" \
+               f"First error encountered: {str(error)}\n" \
+               f"Please ensure your file is a valid CSV file with the correct format."
+
+    def _parse_csv_lines(self, lines: Iterable[str]) -> Iterator[Tuple[str, Dict[str, List[Shift]]]]:
+        """Validate and convert CSV lines in a single pass."""
         try:
-            with open(filename, 'r') as file:
-                reader = csv.reader(file)
-                header = next(reader, None)
-                
-                # Check if file is empty
-                if header is None:
-                    return False, "Error: The input CSV file cannot be used because it is empty. Please provide a file with employee schedule data."
-
-                # Validate header
-                if len(header) != 8:
-                    return False, f"Error: The input CSV file cannot be used because it does not follow the required format.\n" \
-                                f"First error encountered: Invalid header format.\n" \
-                                f"Expected 8 columns (Name + 7 days of the week), but found {len(header)} columns.\n" \
-                                f"Please ensure your CSV file has the following columns: Name, Monday, Tuesday, Wednesday, Thursday, Friday, Saturday, Sunday."
-                
-                if header[0] != "Name":
-                    return False, f"Error: The input CSV file cannot be used because it does not follow the required format.\n" \
-                                f"First error encountered: Invalid first column name.\n" \
-                                f"Expected 'Name' as the first column, but found '{header[0]}'.\n" \
-                                f"Please ensure your CSV file starts with a 'Name' column."
-                
-                # Validate day columns
-                for i, day in enumerate(self.days, 1):
-                    if i >= len(header) or header[i] != day:
-                        return False, f"Error: The input CSV file cannot be used because it does not follow the required format.\n" \
-                                    f"First error encountered: Invalid column {i}.\n" \
-                                    f"Expected '{day}', but found '{header[i] if i < len(header) else 'missing'}'.\n" \
-                                    f"Please ensure your CSV file has the following columns in order: Name, Monday, Tuesday, Wednesday, Thursday, Friday, Saturday, Sunday."
-
-                # Validate each row
-                for row_num, row in enumerate(reader, 2):  # Start from 2 because we already read the header
-                    if len(row) != 8:
-                        return False, f"Error: The input CSV file cannot be used because it does not follow the required format.\n" \
-                                    f"First error encountered: Invalid number of columns in row {row_num}.\n" \
-                                    f"Expected 8 columns, but found {len(row)} columns.\n" \
-                                    f"Please ensure each row has values for Name and all 7 days of the week."
-                    
-                    # Check for empty name
-                    if not row[0].strip():
-                        return False, f"Error: The input CSV file cannot be used because it does not follow the required format.\n" \
-                                    f"First error encountered: Empty employee name in row {row_num}.\n" \
-                                    f"Please ensure all employees have a name."
-                    
-                    # Validate shift codes
-                    for i, shift_code in enumerate(row[1:], 1):
-                        shift_code = shift_code.strip().upper()  # Trim whitespace and convert to uppercase
-                        if shift_code not in ['M', 'A', 'E', 'N']:
-                            return False, f"Error: The input CSV file cannot be used because it does not follow the required format.\n" \
-                                        f"First error encountered: Invalid shift code in row {row_num}, column {i+1}.\n" \
-                                        f"Found '{row[i]}', but only M (Morning), A (Afternoon), E (Evening), or N (No Shift) are allowed."
+            reader = csv.reader(lines)
+            header = next(reader, None)
+
+            # Check if file is empty
+            if header is None:
+                raise CSVFormatError("Error: The input CSV file cannot be used because it is empty. Please provide a file with employee schedule data.")
+
+            # Validate header
+            if len(header) != 8:
+                raise CSVFormatError(f"Error: The input CSV file cannot be used because it does not follow the required format.\n" \
+                            f"First error encountered: Invalid header format.\n" \
+                            f"Expected 8 columns (Name + 7 days of the week), but found {len(header)} columns.\n" \
+                            f"Please ensure your CSV file has the following columns: Name, Monday, Tuesday, Wednesday, Thursday, Friday, Saturday, Sunday.")
+
+            if header[0] != "Name":
+                raise CSVFormatError(f"Error: The input CSV file cannot be used because it does not follow the required format.\n" \
+                            f"First error encountered: Invalid first column name.\n" \
+                            f"Expected 'Name' as the first column, but found '{header[0]}'.\n" \
+                            f"Please ensure your CSV file starts with a 'Name' column.")
+
+            # Validate day columns
+            for i, day in enumerate(self.days, 1):
+                if i >= len(header) or header[i] != day:
+                    raise CSVFormatError(f"Error: The input CSV file cannot be used because it does not follow the required format.\n" \
+                                f"First error encountered: Invalid column {i}.\n" \
+                                f"Expected '{day}', but found '{header[i] if i < len(header) else 'missing'}'.\n" \
+                                f"Please ensure your CSV file has the following columns in order: Name, Monday, Tuesday, Wednesday, Thursday, Friday, Saturday, Sunday.")
+
+            # Validate and convert each row
+            for row_num, row in enumerate(reader, 2):  # Start from 2 because we already read the header
+                if len(row) != 8:
+                    raise CSVFormatError(f"Error: The input CSV file cannot be used because it does not follow the required format.\n" \
+                                f"First error encountered: Invalid number of columns in row {row_num}.\n" \
+                                f"Expected 8 columns, but found {len(row)} columns.\n" \
+                                f"Please ensure each row has values for Name and all 7 days of the week.")
+
+                # Check for empty name
+                if not row[0].strip():
+                    raise CSVFormatError(f"Error: The input CSV file cannot be used because it does not follow the required format.\n" \
+                                f"First error encountered: Empty employee name in row {row_num}.\n" \
+                                f"Please ensure all employees have a name.")
+
+                preferred_shifts = {}
+                for i, shift_code in enumerate(row[1:], 1):
+                    shift_code = shift_code.strip().upper()  # Trim whitespace and convert to uppercase
+                    if shift_code not in _SHIFT_CODES:
+                        raise CSVFormatError(f"Error: The input CSV file cannot be used because it does not follow the required format.\n" \
+                                    f"First error encountered: Invalid shift code in row {row_num}, column {i+1}.\n" \
+                                    f"Found '{row[i]}', but only M (Morning), A (Afternoon), E (Evening), or N (No Shift) are allowed.")
+                    shift = _SHIFT_CODES[shift_code]
+                    if shift != Shift.NO_SHIFT:
+                        preferred_shifts[self.days[i-1]] = [shift]
 
-            return True, "CSV format is valid."
+                yield row[0], preferred_shifts
 
+        except CSVFormatError:
+            raise
         except Exception as e:
-            return False, f"Error: The input CSV file cannot be used because it does not follow the required format.\n" \
-                         f"First error encountered: {str(e)}\n" \
-                         f"Please ensure your file is a valid CSV file with the correct format."
-
-    def load_from_csv(self, filename: str):
-        """Load employee preferences from a CSV file."""
-        # First validate the CSV format
-        is_valid, error_message = self.validate_csv_format(filename)
-        if not is_valid:
-            print(error_message)
-            return False
+            raise CSVFormatError(self._csv_exception_message(e)) from e
 
+    @_phase("validate")
+    def validate_csv_format(self, source: CSVSource) -> tuple[bool, str]:
+        """Validate the CSV file format before processing."""
         try:
-            with open(filename, 'r') as file:
-                reader = csv.reader(file)
-                next(reader)  # Skip header
-                for row in reader:
-                    name = row[0]
-                    preferred_shifts = {}
-                    
-                    for i, shift_code in enumerate(row[1:], 1):
-                        day = self.days[i-1]
-                        shift = Shift.from_code(shift_code)
-                        if shift != Shift.NO_SHIFT:
-                            preferred_shifts[day] = [shift]
-                    
-                    self.add_employee(name, preferred_shifts)
+            for _ in self.iter_csv_preferences(source):
+                pass
+        except CSVFormatError as e:
+            return False, str(e)
+        return True, "CSV format is valid."
+
+    def load_from_csv(self, source: CSVSource):
+        """Load employee preferences from a CSV file in a single pass.
+
+        Either every row is added or, if any row is invalid, none are.
+        """
+        try:
+            self.append_from_csv(source)
             return True
+        except CSVFormatError as e:
+            print(str(e))
+            return False
         except Exception as e:
             print(f"Error processing CSV file: {str(e)}")
             return False
 
+    @_phase("load")
+    def append_from_csv(self, source: CSVSource) -> int:
+        """Append every employee in a preference CSV and return how many.
+
+        Rows are indexed together once the whole file has been read. On any
+        error the roster is left as it was and the exception propagates
+        (load_from_csv prints it instead). Batch jobs, the GUI import and the
+        headless command load through here. With stats on, the time spent
+        reading and validating rows is also recorded as the "validate" phase,
+        part of "load".
+        """
+        first_row = len(self.roster)
+        rows = self.iter_csv_preferences(source)
+        if self.stats is not None:
+            rows = self._timed_rows(rows, "validate")
+        if self.cancel_event is not None:
+            rows = self._cancellable_rows(rows)
+        try:
+            for name, preferred_shifts in rows:
+                self._append_employee(name, preferred_shifts, index=False)
+            self._index_new_rows(first_row)
+        except BaseException:
+            self._truncate_employees(first_row)
+            raise
+        return len(self.roster) - first_row
+
+    def _timed_rows(self, rows: Iterator, phase: str) -> Iterator:
+        """Yield from ``rows``, recording the time spent producing them as ``phase``."""
+        stats, clock = self.stats, time.perf_counter
+        spent = 0.0
+        try:
+            while True:
+                started = clock()
+                try:
+                    row = next(rows, None)
+                finally:
+                    spent += clock() - started
+                if row is None:
+                    return
+                yield row
+        finally:
+            stats.record(phase, spent)
+
+    def _cancellable_rows(self, rows: Iterator) -> Iterator:
+        """Yield from ``rows``, calling check_cancelled every CANCEL_CHECK_ROWS rows."""
+        for count, row in enumerate(rows):
+            if not count % CANCEL_CHECK_ROWS:
+                self.check_cancelled()
+            yield row
+
+    def _truncate_employees(self, count: int):
+        """Drop employees added after the first ``count`` rows, the last ones indexed."""
+        for _, _, candidates in self.index_sets():
+            candidates.truncate(count)
+        if not self.compact:
+            for employee in self.employees[count:]:
+                del self._rows[id(employee)]
+            del self.employees[count:]
+        self.roster.truncate(count)
+
     def add_employee_manually(self):
         """Add an employee by manually entering their preferences."""
         name = input("\nEnter employee name: ").strip()
@@ -167,6 +904,70 @@ class Scheduler:
         self.add_employee(name, preferred_shifts)
         return True
 
+    def _parse_shift(self, label) -> Shift:
+        """Accept a Shift, a shift name such as 'Morning' or a code such as 'M'."""
+        if isinstance(label, Shift) and label in self.shifts:
+            return label
+        text = str(label).strip()
+        for shift in self.shifts:
+            if text.lower() == shift.value.lower() or text.upper() == Shift.to_code(shift):
+                return shift
+        raise ValueError(f"Unknown shift '{label}'. Expected one of: "
+                         f"{', '.join(shift.value for shift in self.shifts)}.")
+
+    def set_demand(self, demand: Dict[str, Dict[Union[Shift, str], int]]):
+        """Set the required headcount for some or all slots; others keep theirs."""
+        updates = []
+        for day, shifts in demand.items():
+            if day not in self.demand:
+                raise ValueError(f"Unknown day '{day}'. Expected one of: {', '.join(self.days)}.")
+            for label, count in shifts.items():
+                shift = self._parse_shift(label)
+                if not isinstance(count, int) or count < 0:
+                    raise ValueError(f"Demand for {day} {shift.value} must be a whole number of at least 0, "
+                                     f"but got {count!r}.")
+                updates.append((day, shift, count))
+        for day, shift, count in updates:
+            self.demand[day][shift] = count
+
+    def load_demand_csv(self, source: CSVSource) -> bool:
+        """Load required headcounts from a CSV laid out like save_schedule_to_csv.
+
+        The header is Shift followed by the seven days; each row starts with a
+        shift name or code followed by one whole number per day.
+        """
+        prefix = "Error: The demand CSV file cannot be used because it does not follow the required format.\n"
+        try:
+            if isinstance(source, (str, os.PathLike)):
+                if not os.path.exists(source):
+                    print(f"Error: File {source} does not exist.")
+                    return False
+                with open(source, 'r', newline='') as file:
+                    rows = list(csv.reader(file))
+            else:
+                rows = list(csv.reader(source))
+
+            if not rows or rows[0] != ['Shift'] + self.days:
+                print(prefix + f"Expected the header: Shift, {', '.join(self.days)}.")
+                return False
+            demand = {day: {} for day in self.days}
+            for row_num, row in enumerate(rows[1:], 2):
+                if len(row) != len(self.days) + 1:
+                    print(prefix + f"Row {row_num} has {len(row)} columns; expected {len(self.days) + 1}.")
+                    return False
+                shift = self._parse_shift(row[0])
+                for day, value in zip(self.days, row[1:]):
+                    if not value.strip().isdigit():
+                        print(prefix + f"Row {row_num}: '{value}' for {day} is not a whole number.")
+                        return False
+                    demand[day][shift] = int(value)
+            self.set_demand(demand)
+            return True
+        except Exception as e:
+            print(prefix + f"First error encountered: {str(e)}")
+            return False
+
+    @_phase("save")
     def save_to_csv(self, filename: str):
         """Save current employee preferences to a CSV file."""
         with open(filename, 'w', newline='') as file:
@@ -184,63 +985,770 @@ class Scheduler:
                         row.append('N')
                 writer.writerow(row)
 
+    @_phase("save")
+    def save_schedule_to_csv(self, filename: str):
+        """Save the generated schedule as a shift x day table, as the GUI shows it."""
+        with open(filename, 'w', newline='') as file:
+            self.write_schedule_csv(file)
+
+    def write_schedule_csv(self, file: TextIO):
+        """Write the shift x day schedule table to an open text file."""
+        writer = csv.writer(file)
+        writer.writerow(['Shift'] + self.days)
+        for shift in self.shifts:
+            writer.writerow([shift.value] + [", ".join(self.schedule[day][shift]) for day in self.days])
+
     def add_employee(self, name: str, preferred_shifts: Dict[str, List[Shift]]):
-        """Add an employee with their preferred shifts."""
-        employee = Employee(name=name, preferred_shifts=preferred_shifts)
-        self.employees.append(employee)
+        """Add an employee with their preferred shifts.
+
+        Once a schedule has been generated, the new employee is slotted into
+        it: they take their preferred shifts where there is room or where the
+        current holder did not ask for that shift, and fill any slot that is
+        still short. Nothing else is rescheduled.
+        """
+        row = self._append_employee(name, preferred_shifts)
+        if self.has_schedule:
+            for day, shifts in preferred_shifts.items():
+                if shifts and shifts[0] in self.schedule.get(day, {}):
+                    self._place_preferred(row, day, shifts[0])
+            self._fill_slots([(day, shift) for day in self.days for shift in self.shifts])
+
+    def _append_employee(self, name: str, preferred_shifts: Dict[str, List[Shift]], index: bool = True) -> int:
+        row = self.roster.append(name, preferred_shifts)
+        if not self.compact:
+            employee = Employee(name=name, preferred_shifts=preferred_shifts)
+            self.employees.append(employee)
+            self._rows[id(employee)] = row
+        if index:
+            self._index_row(row)
+        return row
+
+    def remove_employee(self, employee: Employee):
+        """Remove an employee and refill only the shifts they were working.
+
+        The last employee on the roster moves into the freed row, so nothing
+        else is renumbered; roster order is not kept.
+        """
+        row = self._row_of(employee)
+        if row is None:
+            raise ValueError(f"{employee.name} is not on this roster")
+        freed = []
+        base = row * self.roster.width
+        for d, day in enumerate(self.days):
+            code = self.roster.assignments[base + d]
+            if code != NO_SHIFT_BYTE:
+                freed.append((day, BYTE_SHIFTS[code]))
+                self._unassign_row(row, day)
+
+        last = len(self.roster) - 1
+        self.index_in_row_order = False
+        for day in self.days:
+            self._unindex_day(row, day)
+            if last != row:
+                self._assignable[day].move(last, row)
+                for candidates in self._preferred[day].values():
+                    candidates.move(last, row)
+        if not self.compact:
+            del self._rows[id(self.employees[row])]
+            moved = self.employees.pop()
+            if last != row:
+                self.employees[row] = moved
+                self._rows[id(moved)] = row
+        self.roster.swap_remove(row)
+
+        if self.has_schedule:
+            self._fill_slots(freed)
+
+    def update_preferences(self, employee: Employee, preferred_shifts: Dict[str, List[Shift]]):
+        """Change an employee's preferences and repair the schedule around them.
+
+        Only the days whose preference changed are reassigned; afterwards any
+        slot left short is topped up, as add_employee does.
+        """
+        row = self._row_of(employee)
+        if row is None:
+            raise ValueError(f"{employee.name} is not on this roster")
+        roster = self.roster
+        base = row * roster.width
+        old_codes = roster.preferences[base:base + roster.width]
+        new_codes = roster.pack(preferred_shifts)
+        roster.set_preferences(row, new_codes)
+        if not self.compact:
+            self.employees[row].preferred_shifts = preferred_shifts
+        for day in self.days:
+            self._unindex_day(row, day)
+        self._index_row(row)
+        self.index_in_row_order = False
+
+        if not self.has_schedule:
+            return
+        for d, day in enumerate(self.days):
+            if old_codes[d] == new_codes[d]:
+                continue
+            wanted = BYTE_SHIFTS[new_codes[d]]
+            code = roster.assignments[base + d]
+            current = BYTE_SHIFTS[code] if code != NO_SHIFT_BYTE else None
+            if current is not None and current != wanted:
+                self._unassign_row(row, day)
+            if wanted != Shift.NO_SHIFT and current != wanted:
+                self._place_preferred(row, day, wanted)
+        # Dropping a shift, here or from a displaced holder, can free someone
+        # who was at the weekly cap for slots on other days, so check them all.
+        self._fill_slots([(day, shift) for day in self.days for shift in self.shifts])
+
+    def _rows_on(self, day: str, shift: Shift) -> List[int]:
+        """Rows assigned to ``shift`` on ``day``, found with one bytes scan."""
+        width = self.roster.width
+        column = self.roster.assignments[self._day_index[day]::width]
+        code = SHIFT_BYTES[shift]
+        rows = []
+        row = column.find(code)
+        while row >= 0:
+            rows.append(row)
+            row = column.find(code, row + 1)
+        return rows
+
+    def _place_preferred(self, row: int, day: str, shift: Shift):
+        """Give ``row`` its preferred shift if there is room or a holder who did not want it."""
+        if row not in self._assignable[day]:
+            return
+        if len(self.schedule[day][shift]) >= self.demand[day][shift]:
+            d = self._day_index[day]
+            width = self.roster.width
+            code = SHIFT_BYTES[shift]
+            holders = [other for other in self._rows_on(day, shift)
+                       if self.roster.preferences[other * width + d] != code]
+            if not holders:
+                return
+            self._unassign_row(holders[0], day)
+        self._assign_row(row, day, shift)
+
+    def _fill_slots(self, slots: List[Tuple[str, Shift]]):
+        """Top up the given slots, preferring employees who asked for the shift."""
+        for day, shift in slots:
+            while len(self.schedule[day][shift]) < self.demand[day][shift]:
+                candidates = self._preferred[day][shift] or self._assignable[day]
+                if self.stats is not None:
+                    self.stats.candidate_scans += 1
+                    self.stats.random_fills += 1 if candidates else 0
+                if not candidates:
+                    self._warn(f"Warning: Cannot meet minimum coverage for {day} {shift.value}")
+                    break
+                self._assign_row(self.rng.choice(candidates.items), day, shift)
+
+    def reset_schedule(self):
+        """Clear every assignment so the schedule can be generated from scratch."""
+        roster = self.roster
+        if (self.index_in_row_order and roster.assignments.count(NO_SHIFT_BYTE) == len(roster.assignments)
+                and not any(roster.days_worked)):
+            self.has_schedule = False
+            return  # nothing assigned and the index is as a rebuild would leave it
+        for shifts in self.schedule.values():
+            for names in shifts.values():
+                names.clear()
+        roster.assignments[:] = bytes([NO_SHIFT_BYTE]) * len(roster.assignments)
+        roster.days_worked = array('H', [0]) * len(roster)
+        if not self.compact:
+            for employee in self.employees:
+                employee.assigned_shifts.clear()
+                employee.days_worked = 0
+        self.index_in_row_order = False  # until the rebuild below completes
+        for day in self.days:
+            self._assignable[day] = _IndexedSet()
+            self._preferred[day] = {shift: _IndexedSet() for shift in self.shifts}
+        self._index_new_rows(0)
+        self.index_in_row_order = True
+        self.has_schedule = False
+
+    def set_roster(self, roster: Roster, schedule: Optional[Dict[str, Dict[Shift, List[str]]]] = None,
+                   index: bool = True):
+        """Make ``roster``, with any assignments it holds, this scheduler's roster.
+
+        ``schedule`` gives the names on each shift; by default it is read from
+        the roster's assignments in roster order. In object mode an Employee
+        is created for every row. With ``index`` false the availability index
+        is left empty for the caller to restore through index_sets(), as
+        python/snapshot.py does. has_schedule and index_in_row_order are
+        cleared; set them if the assignments are a generated schedule or the
+        restored index lists rows in ascending order.
+        """
+        if roster.days != self.days:
+            raise ValueError("The roster's days do not match the scheduler's days")
+        self.roster = roster
+        for day, shifts in self.schedule.items():
+            for shift, names in shifts.items():
+                if schedule is not None:
+                    names[:] = schedule[day][shift]
+                    continue
+                code, column = SHIFT_BYTES[shift], roster.assignments[self._day_index[day]::roster.width]
+                names.clear()
+                row = column.find(code)
+                while row >= 0:
+                    names.append(roster.names[row])
+                    row = column.find(code, row + 1)
+        self._rows = {}
+        if self.compact:
+            self.employees = _RosterEmployees(roster)
+        else:
+            self.employees = []
+            for row, name in enumerate(roster.names):
+                employee = Employee(name=name, preferred_shifts=roster.preferred_shifts(row),
+                                    assigned_shifts=dict(_AssignedShiftsView(roster, row).items()),
+                                    days_worked=roster.days_worked[row])
+                self.employees.append(employee)
+                self._rows[id(employee)] = row
+        for day in self.days:
+            self._assignable[day] = _IndexedSet()
+            self._preferred[day] = {shift: _IndexedSet() for shift in self.shifts}
+        if index:
+            self.rebuild_index()
+        else:
+            self.index_in_row_order = False
+        self.has_schedule = False
+
+    def rebuild_index(self):
+        """Rebuild the availability index from the roster's preferences and assignments."""
+        roster = self.roster
+        assignments, days_worked = bytes(roster.assignments), roster.days_worked.tobytes()
+        roster.assignments[:] = bytes([NO_SHIFT_BYTE]) * len(assignments)
+        roster.days_worked = array('H', [0]) * len(roster)
+        self.index_in_row_order = False  # until the rebuild below completes
+        for day in self.days:
+            self._assignable[day] = _IndexedSet()
+            self._preferred[day] = {shift: _IndexedSet() for shift in self.shifts}
+        self._index_new_rows(0)
+        self.index_in_row_order = True
+        self._apply_run(assignments, days_worked, self.schedule)
+
+    def index_sets(self) -> Iterator[Tuple[str, Optional[Shift], _IndexedSet]]:
+        """(day, shift, set) for every availability set, in a fixed order.
+
+        ``shift`` is None for the set of everyone free that day. A set's
+        ``items`` and ``positions`` arrays can be saved and restored as they
+        are, together with the roster they index.
+        """
+        for day in self.days:
+            yield day, None, self._assignable[day]
+            for shift in self.shifts:
+                yield day, shift, self._preferred[day][shift]
+
+    def _row_of(self, employee) -> Optional[int]:
+        """Roster row of an Employee or EmployeeView from this scheduler."""
+        if isinstance(employee, EmployeeView):
+            return employee.row if employee.roster is self.roster else None
+        return self._rows.get(id(employee))
+
+    def _index_row(self, row: int):
+        """Add an employee to the availability index for every open day."""
+        roster = self.roster
+        if roster.days_worked[row] >= self.max_days:
+            return
+        base = row * roster.width
+        for d, day in enumerate(self.days):
+            if roster.assignments[base + d] != NO_SHIFT_BYTE:
+                continue
+            self._assignable[day].add(row)
+            preferred = BYTE_SHIFTS[roster.preferences[base + d]]
+            if preferred in self._preferred[day]:
+                self._preferred[day][preferred].add(row)
+
+    def _index_new_rows(self, first_row: int):
+        """Index every row from ``first_row`` on, all just appended with no shifts.
+
+        Works a day column at a time with bytes operations instead of one
+        _index_row call per employee.
+        """
+        roster = self.roster
+        count = len(roster) - first_row
+        if count <= 0 or self.max_days <= 0:
+            return
+        for d, day in enumerate(self.days):
+            column = roster.preferences[first_row * roster.width + d::roster.width]
+            self.check_cancelled()
+            self._assignable[day].add_flagged(b'\x01' * count, first_row)
+            for shift, candidates in self._preferred[day].items():
+                self.check_cancelled()
+                candidates.add_flagged(column.translate(_SHIFT_FLAG_TABLES[SHIFT_BYTES[shift]]), first_row)
+
+    def _unindex_day(self, row: int, day: str):
+        """Remove an employee from the availability index for one day."""
+        self._assignable[day].discard(row)
+        for candidates in self._preferred[day].values():
+            candidates.discard(row)
 
     def get_available_employees(self, day: str, shift: Shift) -> List[Employee]:
         """Get employees who can work a specific shift on a given day."""
-        return [
-            emp for emp in self.employees
-            if emp.days_worked < 5
-            and day not in emp.assigned_shifts
-            and shift in emp.preferred_shifts.get(day, [])
-        ]
+        return [self.employees[row] for row in self._preferred[day][shift]]
 
     def assign_shift(self, employee: Employee, day: str, shift: Shift):
         """Assign a shift to an employee."""
-        employee.assigned_shifts[day] = shift
-        employee.days_worked += 1
-        self.schedule[day][shift].append(employee.name)
+        row = self._row_of(employee)
+        if row is None:
+            # Not one of ours; record it in the schedule only.
+            employee.assigned_shifts[day] = shift
+            employee.days_worked += 1
+            self.schedule[day][shift].append(employee.name)
+            return
+        self._assign_row(row, day, shift)
+
+    def _assign_row(self, row: int, day: str, shift: Shift):
+        """Assign a shift to the employee in ``row`` and update the index."""
+        roster = self.roster
+        roster.assignments[row * roster.width + self._day_index[day]] = SHIFT_BYTES[shift]
+        roster.days_worked[row] += 1
+        if not self.compact:
+            employee = self.employees[row]
+            employee.assigned_shifts[day] = shift
+            employee.days_worked += 1
+        self.schedule[day][shift].append(roster.names[row])
+        if self.stats is not None:
+            self.stats.assignments += 1
+
+        if roster.days_worked[row] >= self.max_days:
+            for other_day in self.days:
+                self._unindex_day(row, other_day)
+        else:
+            self._unindex_day(row, day)
 
+    @_phase("resolve_conflicts")
     def resolve_conflicts(self):
         """Resolve scheduling conflicts and ensure minimum coverage."""
+        stats = self.stats
         for day in self.days:
             for shift in self.shifts:
+                self.check_cancelled()
                 # Get current assignments for this shift
                 current_assignments = self.schedule[day][shift]
                 
                 # If we need more employees
-                while len(current_assignments) < 2:
-                    # Find available employees who haven't worked 5 days
-                    available_employees = [
-                        emp for emp in self.employees
-                        if emp.days_worked < 5 and day not in emp.assigned_shifts
-                    ]
+                while len(current_assignments) < self.demand[day][shift]:
+                    # Employees who haven't worked 5 days and are free that day
+                    available_rows = self._assignable[day].items
+                    if stats is not None:
+                        stats.candidate_scans += 1
                     
-                    if not available_employees:
-                        print(f"Warning: Cannot meet minimum coverage for {day} {shift.value}")
+                    if not available_rows:
+                        self._warn(f"Warning: Cannot meet minimum coverage for {day} {shift.value}")
                         break
                     
                     # Randomly select an employee
-                    employee = random.choice(available_employees)
-                    self.assign_shift(employee, day, shift)
+                    if stats is not None:
+                        stats.random_fills += 1
+                    self._assign_row(self.rng.choice(available_rows), day, shift)
                     current_assignments = self.schedule[day][shift]
 
-    def generate_schedule(self):
-        """Generate the final schedule."""
-        # First, try to assign preferred shifts
-        for employee in self.employees:
-            for day in self.days:
-                if day in employee.preferred_shifts:
-                    for preferred_shift in employee.preferred_shifts[day]:
-                        if len(self.schedule[day][preferred_shift]) < 2:
-                            self.assign_shift(employee, day, preferred_shift)
-                            break
+    @_phase("assign_preferred")
+    def assign_preferred_shifts(self):
+        """Give employees their preferred shifts, in roster order, while there is room."""
+        # Read the packed codes so compact mode does not unpack a dict per employee.
+        roster = self.roster
+        for row in range(len(roster)):
+            if not row % CANCEL_CHECK_ROWS:
+                self.check_cancelled()
+            base = row * roster.width
+            for d, day in enumerate(self.days):
+                code = roster.preferences[base + d]
+                if code == NO_SHIFT_BYTE or roster.assignments[base + d] != NO_SHIFT_BYTE:
+                    continue
+                if roster.days_worked[row] >= self.max_days:
+                    break
+                preferred_shift = BYTE_SHIFTS[code]
+                if len(self.schedule[day][preferred_shift]) < self.demand[day][preferred_shift]:
+                    self._assign_row(row, day, preferred_shift)
+
+    def enable_stats(self, callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                     sink: Optional[Union[str, os.PathLike, TextIO]] = None) -> SchedulerStats:
+        """Start collecting phase timings and counters, and return the stats object.
+
+        ``callback`` is called with a dict after every phase; ``sink`` is a
+        path (appended to) or text file that gets the same dicts as JSON lines.
+        """
+        self.disable_stats()
+        if isinstance(sink, (str, os.PathLike)):
+            sink = self._stats_file = open(sink, 'a')
+        self.stats = SchedulerStats(callback=callback, sink=sink)
+        return self.stats
+
+    def disable_stats(self) -> Optional[SchedulerStats]:
+        """Stop collecting, close a sink opened from a path, and return the final stats."""
+        stats, self.stats = self.stats, None
+        if self._stats_file is not None:
+            self._stats_file.close()
+            self._stats_file = None
+        return stats
+
+    def check_cancelled(self):
+        """Raise JobCancelled if cancel_event is set.
+
+        Loading and the built-in strategies call this between phases and
+        every so often inside long loops; custom strategies may too.
+        """
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise JobCancelled()
+
+    def _warn(self, message: str):
+        if self.verbose:
+            print(message)
+
+    @_phase("most_constrained")
+    def allocate_most_constrained_first(self):
+        """Fill slots one place at a time, scarcest slot first.
+
+        A slot's scarcity is the number of employees still free that day per
+        place it still needs, with the number who prefer the shift as the
+        tie-breaker. Slots sit in a priority queue; when an assignment changes
+        a slot's figures (another slot on the same day, or every slot once
+        an employee reaches the weekly maximum) a fresh entry is pushed and
+        the old one is skipped when it surfaces. Each place is taken by
+        someone who prefers the shift if possible.
+        """
+        heap = []
+        version: Dict[Tuple[int, int], int] = {}
+
+        def push(d: int, s: int):
+            day, shift = self.days[d], self.shifts[s]
+            need = self.demand[day][shift] - len(self.schedule[day][shift])
+            if need <= 0:
+                return
+            version[(d, s)] = version.get((d, s), 0) + 1
+            key = (len(self._assignable[day]) / need, len(self._preferred[day][shift]) / need)
+            heapq.heappush(heap, (key, d, s, version[(d, s)]))
+
+        for d in range(len(self.days)):
+            for s in range(len(self.shifts)):
+                push(d, s)
+
+        while heap:
+            self.check_cancelled()
+            _, d, s, entry_version = heapq.heappop(heap)
+            if entry_version != version[(d, s)]:
+                continue
+            day, shift = self.days[d], self.shifts[s]
+            candidates = self._preferred[day][shift] or self._assignable[day]
+            if self.stats is not None:
+                self.stats.candidate_scans += 1
+                self.stats.random_fills += 1 if candidates else 0
+            if not candidates:
+                self._warn(f"Warning: Cannot meet minimum coverage for {day} {shift.value}")
+                continue
+            row = self.rng.choice(candidates.items)
+            self._assign_row(row, day, shift)
+            if self.roster.days_worked[row] >= self.max_days:
+                affected = [(other_d, other_s) for other_d in range(len(self.days))
+                            for other_s in range(len(self.shifts))]
+            else:
+                affected = [(d, other_s) for other_s in range(len(self.shifts))]
+            for slot in affected:
+                push(*slot)
+
+    @_phase("generate")
+    def generate_schedule(self, strategy: Optional[SchedulingStrategy] = None, seed: Optional[int] = None,
+                          restarts: int = 1, workers: int = 1) -> GenerationReport:
+        """Generate the final schedule with ``strategy``, or the scheduler's own.
+
+        With a ``seed`` the random fill-ins are reproducible. With
+        ``restarts`` > 1, run ``i`` uses seed ``seed + i`` on its own compact
+        clone of the roster (``workers`` > 1 spreads the runs over processes)
+        and the best-scoring run is kept; generate_schedule(seed=best_seed)
+        reproduces it on its own.
+        """
+        strategy = strategy or self.strategy
+        self.reset_schedule()
+        self.check_cancelled()
+        if restarts <= 1:
+            self.rng = random.Random(seed) if seed is not None else random
+            strategy.generate(self)
+            self.has_schedule = True
+            evaluation = self.evaluate()
+            if self.stats is not None:
+                self.stats.uncovered_slots += sum(len(shifts) for shifts in evaluation.deficits.values())
+            return GenerationReport(runs=[(seed, evaluation.score)], best_seed=seed, best_score=evaluation.score)
+
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        seeds = [seed + i for i in range(restarts)]
+        if workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            state = (self.days, self.shifts, self.demand, self.max_days,
+                     self.roster.names, bytes(self.roster.preferences), strategy)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_restart_worker,
+                                     initargs=(state,)) as pool:
+                results = list(pool.map(_run_restart, seeds))
+        else:
+            results = []
+            for run_seed in seeds:
+                self.check_cancelled()
+                clone = self.clone()
+                results.append(clone._run_seeded(strategy, run_seed))
+
+        best = min(range(restarts), key=lambda i: results[i][0])
+        self.apply_schedule(*results[best][1:], seeds[best])
+        return GenerationReport(runs=[(run_seed, result[0]) for run_seed, result in zip(seeds, results)],
+                                best_seed=seeds[best], best_score=results[best][0])
+
+    def clone(self, share_roster: bool = True) -> 'Scheduler':
+        """Compact copy for a restart run or a background job (scheduler_gui.py).
+
+        Names and preferences are shared, not copied, unless ``share_roster``
+        is false (then the copy may take new employees); the assignment arrays,
+        schedule lists and availability index are copied as flat arrays. No
+        Employee objects are created.
+        """
+        clone = Scheduler(compact=True, strategy=self.strategy)
+        clone.days, clone.shifts = self.days, self.shifts
+        clone.min_coverage, clone.max_days = self.min_coverage, self.max_days
+        clone.demand = self.demand
+        clone.verbose = False
+        clone.stats = self.stats  # counters from in-process runs add up; worker processes report none
+        clone.cancel_event = self.cancel_event
+        roster = Roster(self.days)
+        roster.names = self.roster.names if share_roster else list(self.roster.names)
+        roster.preferences = self.roster.preferences if share_roster else bytearray(self.roster.preferences)
+        roster.assignments = bytearray(self.roster.assignments)
+        roster.days_worked = array('H', self.roster.days_worked)
+        clone.roster = roster
+        clone.employees = _RosterEmployees(roster)
+        clone.schedule = {day: {shift: list(names) for shift, names in shifts.items()}
+                          for day, shifts in self.schedule.items()}
+        clone._assignable = {day: candidates.copy() for day, candidates in self._assignable.items()}
+        clone._preferred = {day: {shift: candidates.copy() for shift, candidates in shifts.items()}
+                            for day, shifts in self._preferred.items()}
+        clone.index_in_row_order = self.index_in_row_order
+        return clone
+
+    def _run_seeded(self, strategy: SchedulingStrategy, seed: int):
+        """Run ``strategy`` with ``seed`` and return (score, assignments, days_worked, schedule)."""
+        self.rng = random.Random(seed)
+        strategy.generate(self)
+        return (self.evaluate().score, bytes(self.roster.assignments),
+                self.roster.days_worked.tobytes(), self.schedule)
 
-        # Resolve any conflicts and ensure minimum coverage
-        self.resolve_conflicts()
+    def apply_schedule(self, assignments: bytes, days_worked: bytes,
+                       schedule: Dict[str, Dict[Shift, List[str]]], seed: Optional[int]):
+        """Install a finished run made from this roster's cleared state.
+
+        ``assignments`` and ``days_worked`` are the bytes of the run's
+        Roster.assignments and Roster.days_worked, ``schedule`` its name lists
+        and ``seed`` the seed it ran with. Call reset_schedule first. Used for
+        the best restart and by python/cache.py; coverage warnings and stats
+        are reported as generate_schedule would.
+        """
+        self._apply_run(assignments, days_worked, schedule)
+        self.rng = random.Random(seed) if seed is not None else random
+        self.has_schedule = True
+        for day, shifts in self.evaluate().deficits.items():
+            for shift in shifts:
+                self._warn(f"Warning: Cannot meet minimum coverage for {day} {shift.value}")
+                if self.stats is not None:
+                    self.stats.uncovered_slots += 1
+
+    def _apply_run(self, assignments: bytes, days_worked: bytes, schedule: Dict[str, Dict[Shift, List[str]]]):
+        """Adopt the result of a run made from this scheduler's cleared state."""
+        roster = self.roster
+        roster.assignments[:] = assignments
+        roster.days_worked = array('H')
+        roster.days_worked.frombytes(days_worked)
+        for day, shifts in schedule.items():
+            for shift, names in shifts.items():
+                self.schedule[day][shift][:] = names
+
+        # Only employees who were given shifts need their index entries redone.
+        worked = roster.assignments.translate(WORKED_TABLE)
+        cell = worked.find(1)
+        while cell >= 0:
+            row, d = divmod(cell, roster.width)
+            day = self.days[d]
+            self._unindex_day(row, day)
+            if roster.days_worked[row] >= self.max_days:
+                for other_day in self.days:
+                    self._unindex_day(row, other_day)
+            if not self.compact:
+                employee = self.employees[row]
+                employee.assigned_shifts[day] = BYTE_SHIFTS[roster.assignments[cell]]
+                employee.days_worked = roster.days_worked[row]
+            cell = worked.find(1, cell + 1)
+
+    def _unassign_row(self, row: int, day: str):
+        """Take away the shift the employee in ``row`` works on ``day``."""
+        roster = self.roster
+        offset = row * roster.width + self._day_index[day]
+        shift = BYTE_SHIFTS[roster.assignments[offset]]
+        roster.assignments[offset] = NO_SHIFT_BYTE
+        roster.days_worked[row] -= 1
+        if not self.compact:
+            employee = self.employees[row]
+            del employee.assigned_shifts[day]
+            employee.days_worked -= 1
+        self.schedule[day][shift].remove(roster.names[row])
+        self._index_row(row)
+        self.index_in_row_order = False
+
+    @_phase("improve")
+    def improve(self, time_budget_ms: float = 100, seed: Optional[int] = None) -> ImprovementReport:
+        """Improve the current schedule by local search until the budget runs out.
+
+        Tries two kinds of move: swapping the shifts of two employees working
+        the same day, and handing one employee's shift to someone free that
+        day (within the weekly maximum). Each move is scored from the handful
+        of cells it changes, and kept unless it makes the schedule worse.
+        Uncovered slots are filled first whenever someone is available.
+        """
+        rng = random.Random(seed)
+        roster = self.roster
+        width = roster.width
+        deadline = time.perf_counter() + time_budget_ms / 1000
+        started = time.perf_counter()
+        evaluation = self.evaluate()
+        score = evaluation.score
+        unpreferred = evaluation.assignments - evaluation.preferred_assignments
+        report = ImprovementReport(initial_score=score, final_score=score)
+
+        def cost(row: int, d: int, shift: Shift) -> int:
+            return 0 if roster.preferences[row * width + d] == SHIFT_BYTES[shift] else 1
+
+        # Rows working each (day index, shift), found with one bytes scan.
+        slot_rows = {(d, shift): [] for d in range(width) for shift in self.shifts}
+        worked = roster.assignments.translate(WORKED_TABLE)
+        cell = worked.find(1)
+        while cell >= 0:
+            row, d = divmod(cell, width)
+            slot_rows[(d, BYTE_SHIFTS[roster.assignments[cell]])].append(row)
+            cell = worked.find(1, cell + 1)
+        slots = list(slot_rows)
+
+        # Fill whatever can still be filled.
+        for (d, shift), rows in slot_rows.items():
+            day = self.days[d]
+            while len(self.schedule[day][shift]) < self.demand[day][shift] and self._assignable[day]:
+                candidates = self._preferred[day][shift] or self._assignable[day]
+                row = rng.choice(candidates.items)
+                self._assign_row(row, day, shift)
+                rows.append(row)
+                unpreferred += cost(row, d, shift)
+                score += cost(row, d, shift) - HARD_PENALTY
+        report.trace.append((time.perf_counter() - started, score))
+
+        while unpreferred and time.perf_counter() < deadline:
+            for _ in range(256):
+                d, shift = rng.choice(slots)
+                rows = slot_rows[(d, shift)]
+                if not rows:
+                    continue
+                day = self.days[d]
+                report.moves_tried += 1
+                position = rng.randrange(len(rows))
+                row = rows[position]
+                current = cost(row, d, shift)
+
+                if rng.random() < 0.5:
+                    # Hand the shift to someone free that day, preferably someone who wants it.
+                    candidates = self._preferred[day][shift]
+                    if not candidates or rng.random() < 0.1:
+                        candidates = self._assignable[day]
+                    if not candidates:
+                        continue
+                    other = rng.choice(candidates.items)
+                    delta = cost(other, d, shift) - current
+                    if delta > 0:
+                        continue
+                    self._unassign_row(row, day)
+                    self._assign_row(other, day, shift)
+                    rows[position] = other
+                else:
+                    # Swap with someone working a different shift the same day.
+                    other_shift = rng.choice(self.shifts)
+                    other_rows = slot_rows[(d, other_shift)]
+                    if other_shift == shift or not other_rows:
+                        continue
+                    other_position = rng.randrange(len(other_rows))
+                    other = other_rows[other_position]
+                    delta = (cost(row, d, other_shift) + cost(other, d, shift)
+                             - current - cost(other, d, other_shift))
+                    if delta > 0:
+                        continue
+                    self._unassign_row(row, day)
+                    self._unassign_row(other, day)
+                    self._assign_row(row, day, other_shift)
+                    self._assign_row(other, day, shift)
+                    rows[position] = other
+                    other_rows[other_position] = row
+
+                report.moves_applied += 1
+                if delta:
+                    score += delta
+                    unpreferred += delta
+                    report.trace.append((time.perf_counter() - started, score))
+
+        report.final_score = score
+        report.elapsed = time.perf_counter() - started
+        return report
+
+    def check_feasibility(self) -> FeasibilityReport:
+        """Bound the coverage any schedule can reach, without assigning anything.
+
+        Anyone free on a day can take any shift that day, so covering the
+        open places is a transportation problem from employees (up to their
+        remaining days) to days. By Hall's condition it can be solved exactly
+        when every set of days needs no more places than its employees can
+        supply, counting each employee for at most their remaining days. The
+        seven days give 128 sets to check, and employees are grouped by free
+        days and remaining capacity, so the cost barely depends on roster size.
+        Per-shift preferences are only reported, as places that must go to
+        someone who did not ask for them.
+        """
+        roster = self.roster
+        width = len(self.days)
+        need = [sum(max(0, self.demand[day][shift] - len(self.schedule[day][shift])) for shift in self.shifts)
+                for day in self.days]
+
+        # (free day mask, days left) -> employees
+        groups: Dict[Tuple[int, int], int] = {}
+        fresh = roster.days_worked.count(0)
+        if fresh and self.max_days > 0:
+            groups[((1 << width) - 1, self.max_days)] = fresh
+        if fresh < len(roster):
+            for row, worked in enumerate(roster.days_worked):
+                if 0 < worked < self.max_days:
+                    base = row * width
+                    mask = sum(1 << d for d in range(width) if roster.assignments[base + d] == NO_SHIFT_BYTE)
+                    key = (mask, self.max_days - worked)
+                    groups[key] = groups.get(key, 0) + 1
+
+        shortfall, blocking = 0, 0
+        for subset in range(1, 1 << width):
+            demand = sum(need[d] for d in range(width) if subset >> d & 1)
+            supply = sum(count * min(days_left, bin(mask & subset).count('1'))
+                         for (mask, days_left), count in groups.items())
+            if demand - supply > shortfall:
+                shortfall, blocking = demand - supply, subset
+
+        day_shortfalls = {}
+        unpreferred = {}
+        for d, day in enumerate(self.days):
+            if need[d] > len(self._assignable[day]):
+                day_shortfalls[day] = need[d] - len(self._assignable[day])
+            for shift in self.shifts:
+                missing = self.demand[day][shift] - len(self.schedule[day][shift]) - len(self._preferred[day][shift])
+                if missing > 0:
+                    unpreferred.setdefault(day, {})[shift] = missing
+
+        return FeasibilityReport(
+            demand=sum(need),
+            capacity=sum(count * min(days_left, bin(mask).count('1')) for (mask, days_left), count in groups.items()),
+            shortfall=shortfall,
+            blocking_days=[day for d, day in enumerate(self.days) if blocking >> d & 1],
+            day_shortfalls=day_shortfalls,
+            unpreferred=unpreferred,
+        )
+
+    def evaluate(self) -> ScheduleEvaluation:
+        """Check the current schedule against the coverage and workload rules."""
+        evaluation = evaluate_assignments(
+            self.roster.assignments, self.roster.preferences, self.days, self.shifts,
+            self.min_coverage, self.max_days, self.demand)
+        scheduled = sum(len(names) for shifts in self.schedule.values() for names in shifts.values())
+        evaluation.double_bookings = scheduled - evaluation.assignments
+        return evaluation
 
     def print_schedule(self):
         """Print the final schedule in a readable format."""
@@ -253,7 +1761,90 @@ class Scheduler:
                 employees = self.schedule[day][shift]
                 print(f"{shift.value}: {', '.join(employees) if employees else 'No assignments'}")
 
+_restart_base: Optional[Scheduler] = None
+_restart_strategy: Optional[SchedulingStrategy] = None
+
+def _init_restart_worker(state):
+    """Build the cleared roster once per worker process."""
+    global _restart_base, _restart_strategy
+    days, shifts, demand, max_days, names, preferences, strategy = state
+    base = Scheduler(compact=True)
+    base.days, base.shifts = days, shifts
+    base.demand, base.max_days = demand, max_days
+    base.verbose = False
+    base.roster.names = names
+    base.roster.preferences = bytearray(preferences)
+    base.roster.assignments = bytearray([NO_SHIFT_BYTE]) * len(preferences)
+    base.roster.days_worked = array('H', [0]) * len(names)
+    base._index_new_rows(0)
+    _restart_base, _restart_strategy = base, strategy
+
+def _run_restart(seed: int):
+    return _restart_base.clone()._run_seeded(_restart_strategy, seed)
+
+def run_headless(argv: List[str]) -> int:
+    """Non-interactive commands, for scripts and pipelines.
+
+    ``generate`` reads a preference CSV and writes the schedule table. Errors
+    and coverage warnings go to stderr so stdout carries only the schedule.
+    Exit status is 0 on success and 1 when an input cannot be used.
+    """
+    import argparse
+    parser = argparse.ArgumentParser(prog="python -m python.scheduler",
+                                     description="Run without the interactive menu.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    generate = commands.add_parser("generate", help="read preferences, write the generated schedule")
+    generate.add_argument("--input", default="-", help="preference CSV, or - for stdin (default)")
+    generate.add_argument("--output", default="-", help="schedule CSV to write, or - for stdout (default)")
+    generate.add_argument("--seed", type=int, help="seed for reproducible fill-ins")
+    generate.add_argument("--strategy", choices=STRATEGY_NAMES, default="greedy")
+    generate.add_argument("--demand", help="CSV of required headcount per shift and day (default: 2 everywhere)")
+    generate.add_argument("--restarts", type=int, default=1, help="keep the best of this many seeded runs")
+    generate.add_argument("--format", choices=["table", "csv", "jsonl", "binary"], default="table",
+                          help="table: shift x day grid (default); csv/jsonl/binary: one record per "
+                               "assigned shift, see python/export.py")
+    generate.add_argument("--split-days", action="store_true",
+                          help="write one file per day; --output is then a directory")
+    generate.add_argument("--workers", type=int, default=1, help="processes for --split-days")
+    generate.add_argument("--cache-dir", help="reuse schedules stored here for the same roster, rules and "
+                                              "seed (seeded runs only, see python/cache.py)")
+    args = parser.parse_args(argv)
+    if args.split_days and (args.format == "table" or args.output == "-"):
+        parser.error("--split-days needs --format csv, jsonl or binary and an --output directory")
+
+    out = sys.stdout
+    scheduler = Scheduler(compact=True)
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.demand and not scheduler.load_demand_csv(args.demand):
+            return 1
+        try:
+            scheduler.append_from_csv(sys.stdin if args.input == "-" else args.input)
+        except CSVFormatError as e:
+            print(str(e))
+            return 1
+        if args.cache_dir:
+            from python.cache import ScheduleCache
+            ScheduleCache(args.cache_dir).generate(scheduler, make_strategy(args.strategy),
+                                                   seed=args.seed, restarts=args.restarts)
+        else:
+            scheduler.generate_schedule(make_strategy(args.strategy), seed=args.seed, restarts=args.restarts)
+
+    if args.format != "table":
+        from python import export
+        if args.split_days:
+            export.export_per_day(scheduler, args.output, args.format, args.workers)
+        else:
+            export.export_schedule(scheduler, args.output, args.format)
+    elif args.output == "-":
+        scheduler.write_schedule_csv(out)
+        out.flush()
+    else:
+        scheduler.save_schedule_to_csv(args.output)
+    return 0
+
 def main():
+    if len(sys.argv) > 1:
+        sys.exit(run_headless(sys.argv[1:]))
     scheduler = Scheduler()
     
     while True:
@@ -297,4 +1888,7 @@ def main():
         print(f"Schedule saved to {filename}")
 
 if __name__ == "__main__":
+    # Under -m this module runs as __main__; register it under its own name
+    # too, so python.solver and worker processes use these classes.
+    sys.modules.setdefault("python.scheduler", sys.modules["__main__"])
     main() 
\ No newline at end of file
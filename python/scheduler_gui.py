@@ -1,14 +1,59 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from python.scheduler import Scheduler, Shift
+from python.scheduler import Scheduler, Shift, CSVFormatError, JobCancelled
 import csv
 import os
+import threading
+
+POLL_MS = 50  # how often the Tk loop checks on a background job
+MAX_NAMES_SHOWN = 100  # names listed per schedule cell before "(+N more)"
+
+class _BackgroundJob:
+    """Runs ``work(scheduler)`` on a daemon thread; the Tk loop polls ``done``.
+
+    ``scheduler`` is a private copy, so the one on screen is never touched
+    while the job runs. ``cancel`` sets the copy's cancel_event; the thread
+    then stops at the scheduler's next check_cancelled and the copy is
+    discarded.
+    """
+
+    def __init__(self, scheduler: Scheduler, work):
+        self.scheduler = scheduler
+        self.error = None
+        self.cancelled = False
+        scheduler.cancel_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(work,), daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self.cancelled = True
+        self.scheduler.cancel_event.set()
+
+    def _run(self, work):
+        try:
+            work(self.scheduler)
+        except Exception as e:
+            self.error = e
+
+    @property
+    def done(self) -> bool:
+        return not self._thread.is_alive()
+
+def format_cell(names) -> str:
+    if not names:
+        return "No assignments"
+    if len(names) > MAX_NAMES_SHOWN:
+        return ", ".join(names[:MAX_NAMES_SHOWN]) + f" (+{len(names) - MAX_NAMES_SHOWN} more)"
+    return ", ".join(names)
 
 class SchedulerGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("Employee Schedule Manager")
         self.scheduler = Scheduler()
+        self._job = None  # the running _BackgroundJob, if any
+        self._rows = {}  # shift -> Treeview item
+        self._shown = {}  # (shift, day) -> names currently displayed
         
         # Configure the main window
         self.root.geometry("800x600")
@@ -27,6 +72,9 @@ class SchedulerGUI:
         # Create schedule display
         self.create_schedule_display()
 
+        # Create progress bar, shown while a background job runs
+        self.create_progress_display()
+
     def create_menu(self):
         menubar = tk.Menu(self.root)
         self.root.config(menu=menubar)
@@ -36,6 +84,7 @@ class SchedulerGUI:
         menubar.add_cascade(label="File", menu=file_menu)
         file_menu.add_command(label="Import CSV", command=self.import_csv)
         file_menu.add_command(label="Save Schedule", command=self.save_schedule)
+        self.action_menu_items = [(file_menu, "Import CSV"), (file_menu, "Save Schedule")]
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.root.quit)
         
@@ -43,17 +92,23 @@ class SchedulerGUI:
         employee_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Employee", menu=employee_menu)
         employee_menu.add_command(label="Add Employee", command=self.show_add_employee_dialog)
+        # Disabled, like action_buttons, while a background job runs
+        self.action_menu_items.append((employee_menu, "Add Employee"))
 
     def create_main_content(self):
         # Create buttons frame
         button_frame = ttk.Frame(self.main_frame)
         button_frame.pack(fill=tk.X, pady=10)
         
-        # Add buttons
-        ttk.Button(button_frame, text="Import CSV", command=self.import_csv).pack(side=tk.LEFT, padx=5)
-        ttk.Button(button_frame, text="Add Employee", command=self.show_add_employee_dialog).pack(side=tk.LEFT, padx=5)
-        ttk.Button(button_frame, text="Generate Schedule", command=self.generate_schedule).pack(side=tk.LEFT, padx=5)
-        ttk.Button(button_frame, text="Save Schedule", command=self.save_schedule).pack(side=tk.LEFT, padx=5)
+        # Add buttons; all of them are disabled while a background job runs
+        self.action_buttons = [
+            ttk.Button(button_frame, text="Import CSV", command=self.import_csv),
+            ttk.Button(button_frame, text="Add Employee", command=self.show_add_employee_dialog),
+            ttk.Button(button_frame, text="Generate Schedule", command=self.generate_schedule),
+            ttk.Button(button_frame, text="Save Schedule", command=self.save_schedule),
+        ]
+        for button in self.action_buttons:
+            button.pack(side=tk.LEFT, padx=5)
 
     def create_schedule_display(self):
         # Create schedule display frame
@@ -61,11 +116,13 @@ class SchedulerGUI:
         self.schedule_frame.pack(fill=tk.BOTH, expand=True, pady=10)
         
         # Create treeview for schedule display
-        self.schedule_tree = ttk.Treeview(self.schedule_frame, columns=("Monday", "Tuesday", "Wednesday", 
+        self.schedule_tree = ttk.Treeview(self.schedule_frame, columns=("Shift", "Monday", "Tuesday", "Wednesday",
                                                                       "Thursday", "Friday", "Saturday", "Sunday"),
                                         show="headings")
         
         # Configure columns
+        self.schedule_tree.heading("Shift", text="Shift")
+        self.schedule_tree.column("Shift", width=80)
         for day in self.scheduler.days:
             self.schedule_tree.heading(day, text=day)
             self.schedule_tree.column(day, width=100)
@@ -78,19 +135,97 @@ class SchedulerGUI:
         self.schedule_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
+    def create_progress_display(self):
+        self.progress_frame = ttk.Frame(self.main_frame)
+        self.status_label = ttk.Label(self.progress_frame)
+        self.status_label.pack(side=tk.LEFT, padx=5)
+        self.progress_bar = ttk.Progressbar(self.progress_frame, mode="indeterminate", length=200)
+        self.progress_bar.pack(side=tk.LEFT, padx=5)
+        ttk.Button(self.progress_frame, text="Cancel", command=self.cancel_job).pack(side=tk.LEFT, padx=5)
+
+    def run_in_background(self, status: str, work, on_success, on_error=None):
+        """Run ``work`` on a copy of the scheduler and adopt the copy when it finishes.
+
+        The Tk loop keeps running meanwhile; it polls the job every POLL_MS.
+        """
+        if self._job is not None:
+            return
+        self._job = _BackgroundJob(self.scheduler.clone(share_roster=False), work)
+        self._job.on_success, self._job.on_error = on_success, on_error
+        self.set_busy(status)
+        self.root.after(POLL_MS, self._poll_job)
+
+    def _poll_job(self):
+        job = self._job
+        if not job.done:
+            self.root.after(POLL_MS, self._poll_job)
+            return
+        self._job = None
+        self.set_idle()
+        if job.cancelled or isinstance(job.error, JobCancelled):
+            return
+        if job.error is not None:
+            if job.on_error is not None:
+                job.on_error(job.error)
+            else:
+                messagebox.showerror("Error", str(job.error))
+            return
+        job.scheduler.verbose = self.scheduler.verbose
+        job.scheduler.cancel_event = None
+        self.scheduler = job.scheduler
+        self.display_schedule()
+        job.on_success()
+
+    def cancel_job(self):
+        """Stop the running job and discard its copy of the scheduler.
+
+        The controls stay disabled until the job's thread has actually
+        stopped, so a new job never runs alongside an abandoned one.
+        """
+        if self._job is not None and not self._job.cancelled:
+            self._job.cancel()
+            self.status_label.configure(text="Cancelling...")
+
+    def set_busy(self, status: str):
+        for button in self.action_buttons:
+            button.state(["disabled"])
+        for menu, label in self.action_menu_items:
+            menu.entryconfigure(label, state=tk.DISABLED)
+        self.status_label.configure(text=status)
+        self.progress_frame.pack(fill=tk.X, pady=5)
+        self.progress_bar.start()
+
+    def set_idle(self):
+        self.progress_bar.stop()
+        self.progress_frame.pack_forget()
+        for button in self.action_buttons:
+            button.state(["!disabled"])
+        for menu, label in self.action_menu_items:
+            menu.entryconfigure(label, state=tk.NORMAL)
+
     def import_csv(self):
         filename = filedialog.askopenfilename(
             title="Select CSV File",
             filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
         )
         if filename:
-            if self.scheduler.load_from_csv(filename):
-                self.generate_schedule()
-                messagebox.showinfo("Success", "Schedule imported successfully!")
-            else:
-                messagebox.showerror("Error", "Failed to import schedule. Please check the file format.")
+            def work(scheduler):
+                # All or nothing: on a bad row the copy is dropped and the
+                # scheduler on screen keeps its employees.
+                scheduler.append_from_csv(filename)
+                scheduler.generate_schedule()
+
+            def failed(error):
+                detail = str(error) if isinstance(error, CSVFormatError) else f"Error processing CSV file: {error}"
+                messagebox.showerror("Error", f"Failed to import schedule. Please check the file format.\n\n{detail}")
+
+            self.run_in_background(
+                f"Importing {os.path.basename(filename)}...", work,
+                lambda: messagebox.showinfo("Success", "Schedule imported successfully!"), failed)
 
     def show_add_employee_dialog(self):
+        if self._job is not None:
+            return  # the running job's result would replace the edit
         # Create dialog window
         dialog = tk.Toplevel(self.root)
         dialog.title("Add Employee")
@@ -128,7 +263,11 @@ class SchedulerGUI:
                     preferred_shifts[day] = [shift]
             
             self.scheduler.add_employee(name, preferred_shifts)
-            self.generate_schedule()
+            if self.scheduler.has_schedule:
+                # add_employee already slotted them into the existing schedule
+                self.display_schedule()
+            else:
+                self.generate_schedule()
             dialog.destroy()
             messagebox.showinfo("Success", f"Employee {name} added successfully!")
         
@@ -136,20 +275,22 @@ class SchedulerGUI:
         ttk.Button(dialog, text="Save", command=save_employee).pack(pady=10)
 
     def generate_schedule(self):
-        # Clear existing schedule
-        for item in self.schedule_tree.get_children():
-            self.schedule_tree.delete(item)
-        
-        # Generate new schedule
-        self.scheduler.generate_schedule()
-        
-        # Display schedule
+        # Generate new schedule off the Tk loop; display_schedule runs when it is done
+        self.run_in_background("Generating schedule...", lambda scheduler: scheduler.generate_schedule(),
+                               lambda: None)
+
+    def display_schedule(self):
+        """Show the current schedule, rewriting only the cells that changed."""
         for shift in self.scheduler.shifts:
-            row = [shift.value]
+            item = self._rows.get(shift)
+            if item is None:
+                item = self._rows[shift] = self.schedule_tree.insert(
+                    "", tk.END, values=[shift.value] + [format_cell([])] * len(self.scheduler.days))
             for day in self.scheduler.days:
                 employees = self.scheduler.schedule[day][shift]
-                row.append(", ".join(employees) if employees else "No assignments")
-            self.schedule_tree.insert("", tk.END, values=row)
+                if self._shown.get((shift, day)) != employees:
+                    self.schedule_tree.set(item, day, format_cell(employees))
+                    self._shown[(shift, day)] = list(employees)
 
     def save_schedule(self):
         filename = filedialog.asksaveasfilename(
@@ -0,0 +1,284 @@
+"""Optimal scheduling strategy based on min-cost flow.
+
+The week is modelled as a flow network::
+
+    source -> employee -> (employee, day) -> (day, shift) slot -> sink
+
+Employees carry up to ``max_days`` units, each (employee, day) node one unit
+and each slot as many units as it is short of its demand. An edge into
+a slot costs 0 when the shift is the employee's preference for that day and
+1 otherwise. Successive shortest augmenting paths give a maximum flow, so
+every slot that can be covered is covered, at the lowest number of
+unpreferred assignments.
+
+Flow is bounded by the total demand (42 with the default of two per
+shift), so only the employees the solver has assigned need explicit nodes.
+Employees with no shifts yet are interchangeable for the flow and are
+represented by one pool node per day, drawn from the scheduler's
+availability index. The solve starts from every preferred assignment that
+fits, which costs nothing and is therefore already a min-cost flow; only the
+slots that leaves short need augmenting paths. Each path is found with
+Dijkstra over reduced costs (Johnson potentials) in a graph whose size
+depends on the demand, not on the roster; paths that just hand a slot to a
+fresh employee are taken without a search once they are provably shortest.
+
+Usage:
+    scheduler.generate_schedule(strategy=MinCostFlowStrategy())
+"""
+import heapq
+from array import array
+from itertools import count
+from typing import Dict, List, Optional, Tuple
+
+from python.scheduler import Scheduler, SchedulingStrategy, Shift, NO_SHIFT_BYTE
+
+_SOURCE = ("source",)
+_SINK = ("sink",)
+
+
+class _FlowSolver:
+    """Residual network for one solve, built lazily from the scheduler state."""
+
+    def __init__(self, scheduler: Scheduler):
+        self.scheduler = scheduler
+        self.roster = scheduler.roster
+        self.width = self.roster.width
+        self.shift_codes = {shift: ord(Shift.to_code(shift)) for shift in scheduler.shifts}
+
+        # Slots already filled before the solve stay as they are.
+        self.need: Dict[Tuple[int, Shift], int] = {}
+        for d, day in enumerate(scheduler.days):
+            for shift in scheduler.shifts:
+                self.need[(d, shift)] = max(0, scheduler.demand[day][shift] - len(scheduler.schedule[day][shift]))
+        self.members: Dict[Tuple[int, Shift], List[int]] = {slot: [] for slot in self.need}
+
+        # Explicit employees: anyone who already works some days but still has
+        # capacity, plus everyone the solver assigns.
+        self.capacity: Dict[int, int] = {}
+        self.moves: Dict[int, Dict[int, Shift]] = {}
+        # Node potentials are ``_potential.get(node, 0) + _offset``; nodes the
+        # last search did not reach move up with the offset alone.
+        self._potential: Dict[tuple, int] = {}
+        self._offset = 0
+        self._next_fresh: Dict[object, int] = {}  # candidates key -> scan position
+        self.scans = 0  # availability index lookups, reported as SchedulerStats.candidate_scans
+        for row, worked in enumerate(self.roster.days_worked):
+            if 0 < worked < scheduler.max_days:
+                self._touch(row)
+
+    def _touch(self, row: int):
+        if row not in self.capacity:
+            self.capacity[row] = self.scheduler.max_days - self.roster.days_worked[row]
+            self.moves[row] = {}
+            # Untouched employees sit at distance 0 from the source, so their
+            # nodes keep potential 0 when they become explicit.
+            self._potential[("employee", row)] = -self._offset
+            for d in range(self.width):
+                self._potential[("day", row, d)] = -self._offset
+
+    def _move(self, row: int, slot: Tuple[int, Shift]):
+        """Send one unit from ``row`` into ``slot``, making the employee explicit if needed."""
+        self._touch(row)
+        self.capacity[row] -= 1
+        self.moves[row][slot[0]] = slot[1]
+        self.members[slot].append(row)
+
+    def _is_free(self, row: int, d: int) -> bool:
+        """No fixed assignment on day ``d`` (solver moves are handled by the graph)."""
+        return self.roster.assignments[row * self.width + d] == NO_SHIFT_BYTE
+
+    def _cost(self, row: int, d: int, shift: Shift) -> int:
+        return 0 if self.roster.preferences[row * self.width + d] == self.shift_codes[shift] else 1
+
+    def _first_fresh(self, key, candidates: array) -> Optional[int]:
+        """First row of ``candidates`` the solve has not touched yet.
+
+        Rows are touched but never released during a solve, so each scan
+        resumes where the previous one for ``key`` stopped.
+        """
+        self.scans += 1
+        i = self._next_fresh.get(key, 0)
+        while i < len(candidates) and candidates[i] in self.capacity:
+            i += 1
+        self._next_fresh[key] = i
+        return candidates[i] if i < len(candidates) else None
+
+    def _fresh(self):
+        """A fresh employee per preferred (day, shift), and one for any slot."""
+        scheduler = self.scheduler
+        preferred = {}
+        for d, day in enumerate(scheduler.days):
+            for shift in scheduler.shifts:
+                preferred[(d, shift)] = self._first_fresh((d, shift), scheduler._preferred[day][shift].items)
+        any_fresh = self._first_fresh(None, scheduler._assignable[scheduler.days[0]].items)
+        return preferred, any_fresh
+
+    def _start_preferred(self):
+        """Fill slots with employees who prefer them, as far as they go.
+
+        Every edge used costs 0 and no edge costs less, so the result is a
+        min-cost flow for its value and all residual edges start with
+        non-negative cost, as Dijkstra needs.
+        """
+        scheduler = self.scheduler
+        for d, day in enumerate(scheduler.days):
+            for shift in scheduler.shifts:
+                slot = (d, shift)
+                members, need = self.members[slot], self.need[slot]
+                if need:
+                    self.scans += 1
+                for row in scheduler._preferred[day][shift].items:
+                    if len(members) >= need:
+                        break
+                    if row in self.capacity and (self.capacity[row] <= 0 or d in self.moves[row]):
+                        continue
+                    self._move(row, slot)
+
+    def _edges(self, node, fresh_preferred, any_fresh):
+        """Residual edges out of ``node`` as (target, cost) pairs."""
+        kind = node[0]
+        if kind == "source":
+            for row, capacity in self.capacity.items():
+                if capacity > 0:
+                    yield ("employee", row), 0
+            if any_fresh is not None:
+                for d in range(self.width):
+                    yield ("pool", d), 0
+        elif kind == "pool":
+            d = node[1]
+            for shift in self.scheduler.shifts:
+                yield ("slot", d, shift), 0 if fresh_preferred[(d, shift)] is not None else 1
+        elif kind == "employee":
+            row = node[1]
+            for d in range(self.width):
+                if d not in self.moves[row] and self._is_free(row, d):
+                    yield ("day", row, d), 0
+        elif kind == "day":
+            row, d = node[1], node[2]
+            current = self.moves[row].get(d)
+            if current is not None:
+                yield ("employee", row), 0
+            for shift in self.scheduler.shifts:
+                if shift != current:
+                    yield ("slot", d, shift), self._cost(row, d, shift)
+        elif kind == "slot":
+            slot = (node[1], node[2])
+            if len(self.members[slot]) < self.need[slot]:
+                yield _SINK, 0
+            for row in self.members[slot]:
+                yield ("day", row, slot[0]), -self._cost(row, slot[0], slot[1])
+
+    def _take_pool_paths(self):
+        """Augment source -> pool -> slot -> sink directly while that is a shortest path.
+
+        No path has a negative reduced cost, so one whose reduced cost is 0
+        is a shortest path and needs no search. For these paths the reduced
+        cost is the pool edge's cost minus the sink's potential (the
+        source's stays 0). Typically this fills the slots that only an
+        unpreferred fresh employee can take.
+        """
+        sink_potential = self._potential.get(_SINK, 0) + self._offset
+        scheduler = self.scheduler
+        for (d, shift), need in self.need.items():
+            members = self.members[(d, shift)]
+            while len(members) < need:
+                row = self._first_fresh((d, shift), scheduler._preferred[scheduler.days[d]][shift].items)
+                cost = 0
+                if row is None:
+                    row = self._first_fresh(None, scheduler._assignable[scheduler.days[0]].items)
+                    cost = 1
+                if row is None or cost != sink_potential:
+                    break
+                self._move(row, (d, shift))
+
+    def _shortest_path(self):
+        """Dijkstra from the source over reduced costs; returns the node path or None."""
+        fresh_preferred, any_fresh = self._fresh()
+        potential, offset = self._potential, self._offset
+        distance = {_SOURCE: 0}
+        parent = {}
+        settled = set()
+        order = count(0, -1)  # newest first among equal distances: reaches the sink sooner
+        heap = [(0, next(order), _SOURCE)]
+        while heap:
+            dist, _, node = heapq.heappop(heap)
+            if node in settled:
+                continue
+            settled.add(node)
+            if node is _SINK:
+                break
+            base = dist + potential.get(node, 0)
+            for target, cost in self._edges(node, fresh_preferred, any_fresh):
+                candidate = base + cost - potential.get(target, 0)
+                if target not in settled and candidate < distance.get(target, candidate + 1):
+                    distance[target] = candidate
+                    parent[target] = node
+                    heapq.heappush(heap, (candidate, next(order), target))
+        if _SINK not in settled:
+            return None
+
+        # Raise every potential by min(distance, sink distance); unreached
+        # nodes get the sink distance through the shared offset. Reduced
+        # costs stay non-negative and are 0 along the path.
+        limit = distance[_SINK]
+        for node, dist in distance.items():
+            if dist < limit:
+                potential[node] = potential.get(node, 0) + dist - limit
+        self._offset = offset + limit
+
+        path = [_SINK]
+        while path[-1] is not _SOURCE:
+            path.append(parent[path[-1]])
+        path.reverse()
+        return path, fresh_preferred, any_fresh
+
+    def _augment(self, path, fresh_preferred, any_fresh):
+        for node, target in zip(path, path[1:]):
+            kind, target_kind = node[0], target[0]
+            if kind == "pool":
+                slot = (target[1], target[2])
+                row = fresh_preferred[slot]
+                if row is None:
+                    row = any_fresh
+                self._move(row, slot)
+            elif kind == "employee" and target_kind == "day":
+                self.capacity[node[1]] -= 1
+            elif kind == "day" and target_kind == "employee":
+                self.capacity[node[1]] += 1
+            elif kind == "day" and target_kind == "slot":
+                row, slot = node[1], (target[1], target[2])
+                self.moves[row][slot[0]] = slot[1]
+                self.members[slot].append(row)
+            elif kind == "slot" and target_kind == "day":
+                row, slot = target[1], (node[1], node[2])
+                del self.moves[row][slot[0]]
+                self.members[slot].remove(row)
+
+    def solve(self) -> List[Tuple[int, int, Shift]]:
+        """Run to maximum flow and return (row, day index, shift) assignments."""
+        self._start_preferred()
+        while True:
+            self.scheduler.check_cancelled()
+            self._take_pool_paths()
+            found = self._shortest_path()
+            if found is None:
+                break
+            self._augment(*found)
+        return [(row, d, shift) for row, days in self.moves.items() for d, shift in days.items()]
+
+
+class MinCostFlowStrategy(SchedulingStrategy):
+    """Cover every slot that can be covered, with the fewest unpreferred shifts."""
+    name = "min-cost-flow"
+
+    def generate(self, scheduler: Scheduler):
+        solver = _FlowSolver(scheduler)
+        for row, d, shift in sorted(solver.solve()):
+            scheduler._assign_row(row, scheduler.days[d], shift)
+        if scheduler.stats is not None:
+            scheduler.stats.candidate_scans += solver.scans
+
+        for day in scheduler.days:
+            for shift in scheduler.shifts:
+                if len(scheduler.schedule[day][shift]) < scheduler.demand[day][shift]:
+                    scheduler._warn(f"Warning: Cannot meet minimum coverage for {day} {shift.value}")
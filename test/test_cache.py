@@ -0,0 +1,61 @@
+"""ScheduleCache hits must install exactly what generate_schedule would produce.
+
+Run from the repository root:
+    python -m pytest test/
+    python -m unittest discover -s test
+"""
+import random
+import tempfile
+import unittest
+
+from python.cache import ScheduleCache
+from python.scheduler import Scheduler
+from test_scheduler import random_preferences, random_scheduler, fresh_copy, result
+
+
+def edited_to_match(scheduler: Scheduler, rng: random.Random) -> Scheduler:
+    """A roster equal to ``scheduler`` but reached by editing preferences."""
+    edited = fresh_copy(scheduler)
+    rows = rng.sample(range(len(edited.roster)), k=min(3, len(edited.roster)))
+    for row in rows:
+        edited.update_preferences(edited.employees[row], random_preferences(rng, edited.days))
+    for row in rows:
+        edited.update_preferences(edited.employees[row], scheduler.roster.preferred_shifts(row))
+    return edited
+
+
+class ScheduleCacheTest(unittest.TestCase):
+
+    def _check_hits(self, make_cache):
+        rng = random.Random(21)
+        for case in range(30):
+            with self.subTest(case=case):
+                cache = make_cache()
+                source = random_scheduler(rng, compact=case % 2 == 0, size=rng.randrange(6, 25))
+                edited = edited_to_match(source, rng)
+                expected = edited_to_match(source, rng)
+                cache.generate(source, seed=4)
+                misses = cache.misses
+                cache.generate(edited, seed=4)
+                self.assertEqual(cache.misses, misses)
+                expected.generate_schedule(seed=4)
+                self.assertEqual(result(edited), result(expected))
+                self.assertEqual(result(edited), result(source))
+
+    def test_hit_matches_generation_after_edits(self):
+        self._check_hits(ScheduleCache)
+
+    def test_disk_hit_matches_generation_after_edits(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        def make_cache():
+            # Nothing is kept in memory, so the hit is read back from disk.
+            cache = ScheduleCache(directory.name, max_entries=0)
+            cache.clear()
+            return cache
+        self._check_hits(make_cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+"""Seeded generation and roster edits on random rosters.
+
+Run from the repository root:
+    python -m pytest test/
+    python -m unittest discover -s test
+"""
+import contextlib
+import io
+import os
+import random
+import unittest
+
+from python.scheduler import (Scheduler, Shift, JobCancelled, NO_SHIFT_BYTE, SHIFT_BYTES, STRATEGY_NAMES,
+                              make_strategy)
+
+SHIFT_CHOICES = [Shift.MORNING, Shift.AFTERNOON, Shift.EVENING, Shift.NO_SHIFT]
+
+
+def quiet():
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def random_preferences(rng: random.Random, days):
+    return {day: [rng.choice(SHIFT_CHOICES)] for day in days}
+
+
+def random_scheduler(rng: random.Random, compact: bool, size: int) -> Scheduler:
+    scheduler = Scheduler(compact=compact)
+    scheduler.verbose = False
+    for i in range(size):
+        scheduler.add_employee(f"e{i}", random_preferences(rng, scheduler.days))
+    return scheduler
+
+
+def fresh_copy(scheduler: Scheduler) -> Scheduler:
+    """The same roster, in the same row order, added to a new scheduler."""
+    copy = Scheduler(compact=scheduler.compact)
+    copy.verbose = False
+    for row, name in enumerate(scheduler.roster.names):
+        copy.add_employee(name, scheduler.roster.preferred_shifts(row))
+    return copy
+
+
+def result(scheduler: Scheduler):
+    return bytes(scheduler.roster.assignments), repr(scheduler.schedule)
+
+
+class SeededGenerationTest(unittest.TestCase):
+
+    def _edited(self, rng: random.Random, compact: bool, generate_first: bool) -> Scheduler:
+        scheduler = random_scheduler(rng, compact, rng.randrange(6, 25))
+        if generate_first:
+            scheduler.generate_schedule(seed=rng.randrange(100))
+        for _ in range(rng.randrange(1, 6)):
+            employee = scheduler.employees[rng.randrange(len(scheduler.employees))]
+            scheduler.update_preferences(employee, random_preferences(rng, scheduler.days))
+        if rng.random() < 0.5:
+            scheduler.remove_employee(scheduler.employees[rng.randrange(len(scheduler.employees))])
+        return scheduler
+
+    def test_seed_decides_the_schedule_after_edits(self):
+        rng = random.Random(11)
+        for case in range(50):
+            compact, generate_first = case % 2 == 0, case % 3 == 0
+            with self.subTest(case=case, compact=compact, generate_first=generate_first):
+                edited = self._edited(rng, compact, generate_first)
+                fresh = fresh_copy(edited)
+                edited.generate_schedule(seed=4)
+                fresh.generate_schedule(seed=4)
+                self.assertEqual(result(edited), result(fresh))
+
+    def test_worker_count_does_not_change_restarts(self):
+        rng = random.Random(12)
+        for case in range(4):
+            with self.subTest(case=case):
+                edited = self._edited(rng, compact=True, generate_first=case % 2 == 1)
+                other = fresh_copy(edited)
+                in_process = edited.generate_schedule(seed=7, restarts=3, workers=1)
+                with quiet():
+                    pooled = other.generate_schedule(seed=7, restarts=3, workers=2)
+                self.assertEqual(in_process.runs, pooled.runs)
+                self.assertEqual(result(edited), result(other))
+
+
+class EditRepairTest(unittest.TestCase):
+    """Invariants that add_employee, remove_employee and update_preferences keep."""
+
+    def assert_consistent(self, scheduler: Scheduler):
+        roster, width = scheduler.roster, scheduler.roster.width
+        for row in range(len(roster)):
+            codes = roster.assignments[row * width:(row + 1) * width]
+            self.assertEqual(roster.days_worked[row], width - codes.count(NO_SHIFT_BYTE))
+            self.assertLessEqual(roster.days_worked[row], scheduler.max_days)
+        for d, day in enumerate(scheduler.days):
+            column = roster.assignments[d::width]
+            free = [row for row in range(len(roster))
+                    if column[row] == NO_SHIFT_BYTE and roster.days_worked[row] < scheduler.max_days]
+            for shift in scheduler.shifts:
+                names = sorted(roster.names[row] for row in range(len(roster)) if column[row] == SHIFT_BYTES[shift])
+                self.assertEqual(sorted(scheduler.schedule[day][shift]), names, (day, shift))
+                self.assertLessEqual(len(names), scheduler.demand[day][shift], (day, shift))
+                if len(names) < scheduler.demand[day][shift]:
+                    self.assertEqual(free, [], f"{day} {shift.value} is short but {free} are free")
+        rebuilt = scheduler.clone()
+        rebuilt.rebuild_index()
+        self.assertEqual([sorted(candidates) for _, _, candidates in scheduler.index_sets()],
+                         [sorted(candidates) for _, _, candidates in rebuilt.index_sets()])
+
+    def test_edit_sequences_leave_no_fillable_slot_short(self):
+        rng = random.Random(13)
+        for case in range(60):
+            compact = case % 2 == 0
+            scheduler = random_scheduler(rng, compact, rng.randrange(4, 14))
+            scheduler.generate_schedule(seed=case)
+            added = len(scheduler.roster)
+            for step in range(25):
+                with self.subTest(case=case, compact=compact, step=step):
+                    action = rng.random()
+                    if action < 0.6:
+                        employee = scheduler.employees[rng.randrange(len(scheduler.employees))]
+                        scheduler.update_preferences(employee, random_preferences(rng, scheduler.days))
+                    elif action < 0.8 or len(scheduler.roster) < 3:
+                        scheduler.add_employee(f"n{added}", random_preferences(rng, scheduler.days))
+                        added += 1
+                    else:
+                        scheduler.remove_employee(scheduler.employees[rng.randrange(len(scheduler.employees))])
+                    self.assert_consistent(scheduler)
+
+
+class _SetAfter:
+    """Stands in for threading.Event: reports set from the ``calls``-th check on."""
+
+    def __init__(self, calls: int):
+        self.calls = calls
+
+    def is_set(self) -> bool:
+        self.calls -= 1
+        return self.calls < 0
+
+
+class CancellationTest(unittest.TestCase):
+
+    def test_cancelled_load_leaves_the_roster_as_it_was(self):
+        rng = random.Random(14)
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "all_shifts_assigned.csv")
+        scheduler = random_scheduler(rng, compact=True, size=9)
+        scheduler.remove_employee(scheduler.employees[2])
+        before = (list(scheduler.roster.names), [sorted(c) for _, _, c in scheduler.index_sets()])
+        for calls in range(40):
+            with self.subTest(calls=calls):
+                scheduler.cancel_event = _SetAfter(calls)
+                try:
+                    scheduler.append_from_csv(path)
+                except JobCancelled:
+                    pass
+                else:
+                    break  # ran past the last check
+                self.assertEqual((list(scheduler.roster.names), [sorted(c) for _, _, c in scheduler.index_sets()]),
+                                 before)
+        self.assertGreater(calls, 20)
+
+    def test_generation_after_a_cancelled_one_is_unaffected(self):
+        for strategy in STRATEGY_NAMES:
+            rng = random.Random(15)
+            scheduler = random_scheduler(rng, compact=False, size=15)
+            scheduler.strategy = make_strategy(strategy)
+            expected = fresh_copy(scheduler)
+            expected.strategy = scheduler.strategy
+            expected.generate_schedule(seed=2)
+            for calls in range(60):
+                with self.subTest(strategy=strategy, calls=calls):
+                    if calls % 2:
+                        scheduler.update_preferences(scheduler.employees[0], scheduler.roster.preferred_shifts(0))
+                    else:
+                        scheduler.generate_schedule(seed=3)
+                    scheduler.cancel_event = _SetAfter(calls)
+                    try:
+                        scheduler.generate_schedule(seed=2)
+                    except JobCancelled:
+                        pass
+                    scheduler.cancel_event = None
+                    scheduler.generate_schedule(seed=2)
+                    self.assertEqual(result(scheduler), result(expected))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,195 @@
+"""Round trips through save_snapshot and load_snapshot for every CSV in test/.
+
+Run from the repository root:
+    python -m pytest test/
+    python -m unittest discover -s test
+"""
+import contextlib
+import glob
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from python.scheduler import Scheduler
+from python.snapshot import PREAMBLE, save_snapshot, load_snapshot
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CSV_FILES = sorted(glob.glob(os.path.join(HERE, "*.csv")))
+INVALID = {"empty_names.csv", "invalid_format.csv", "invalid_shift_codes.csv"}
+
+
+def quiet():
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def load_csv(path: str, compact: bool) -> Scheduler:
+    scheduler = Scheduler(compact=compact)
+    with quiet():
+        loaded = scheduler.load_from_csv(path)
+    return scheduler if loaded else None
+
+
+def roster_state(scheduler: Scheduler):
+    """Everything a snapshot stores except the availability index."""
+    roster = scheduler.roster
+    return (list(roster.names), bytes(roster.preferences), bytes(roster.assignments),
+            roster.days_worked.tobytes(), repr(scheduler.schedule), scheduler.demand,
+            scheduler.min_coverage, scheduler.max_days, scheduler.has_schedule)
+
+
+def index_state(scheduler: Scheduler, ordered: bool):
+    """The availability index; a rebuilt index has the same rows in another order."""
+    contents = (lambda s: (s.items.tobytes(), s.positions.tobytes())) if ordered else (lambda s: sorted(s))
+    return [(day, shift, contents(candidates)) for day, shift, candidates in scheduler.index_sets()]
+
+
+def result(scheduler: Scheduler):
+    return bytes(scheduler.roster.assignments), repr(scheduler.schedule)
+
+
+class SnapshotRoundTripTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "roster.snap")
+
+    def test_fixtures_are_present(self):
+        self.assertEqual(len(CSV_FILES), 7)
+
+    def test_invalid_files_are_rejected(self):
+        for path in CSV_FILES:
+            if os.path.basename(path) in INVALID:
+                for compact in (True, False):
+                    with self.subTest(path=path, compact=compact):
+                        self.assertIsNone(load_csv(path, compact))
+
+    def test_round_trip(self):
+        for path in CSV_FILES:
+            if os.path.basename(path) in INVALID:
+                continue
+            for compact in (True, False):
+                for generated in (False, True):
+                    source = load_csv(path, compact)
+                    self.assertIsNotNone(source, path)
+                    if generated:
+                        with quiet():
+                            source.generate_schedule(seed=5)
+                    for index in (True, False):
+                        save_snapshot(source, self.path, index=index)
+                        for shared in (False, True):
+                            with self.subTest(path=os.path.basename(path), compact=compact,
+                                              generated=generated, index=index, shared=shared):
+                                self._check(source, compact, index, shared)
+
+    def _check(self, source: Scheduler, compact: bool, index: bool, shared: bool):
+        loaded = load_snapshot(self.path, compact=compact, shared=shared)
+        self.assertEqual(roster_state(loaded), roster_state(source))
+        self.assertEqual(index_state(loaded, index), index_state(source, index))
+        if not compact:
+            self.assertEqual(loaded.employees, source.employees)
+
+        # Generating from the snapshot matches generating from the same state
+        # loaded the other way, in either mode and in a clone.
+        other = load_snapshot(self.path, compact=not compact)
+        clone = loaded.clone()
+        with quiet():
+            for scheduler in (loaded, other, clone):
+                scheduler.generate_schedule(seed=9)
+        self.assertEqual(result(loaded), result(other))
+        self.assertEqual(result(loaded), result(clone))
+
+    def test_fresh_snapshot_generates_like_csv(self):
+        for path in CSV_FILES:
+            if os.path.basename(path) in INVALID:
+                continue
+            with self.subTest(path=os.path.basename(path)):
+                expected = load_csv(path, compact=False)
+                save_snapshot(load_csv(path, compact=True), self.path)
+                loaded = load_snapshot(self.path, shared=True)
+                with quiet():
+                    expected.generate_schedule(seed=3)
+                    loaded.generate_schedule(seed=3)
+                self.assertEqual(result(loaded), result(expected))
+
+    def test_shared_index_is_not_written_back(self):
+        source = load_csv(os.path.join(HERE, "all_shifts_assigned.csv"), compact=True)
+        save_snapshot(source, self.path)
+        with open(self.path, 'rb') as file:
+            before = file.read()
+        loaded = load_snapshot(self.path, shared=True)
+        with quiet():
+            loaded.generate_schedule(seed=1)
+            loaded.remove_employee(loaded.employees[0])
+        with open(self.path, 'rb') as file:
+            self.assertEqual(file.read(), before)
+        self.assertEqual(index_state(loaded, False), index_state(self._rebuilt(loaded), False))
+
+    @staticmethod
+    def _rebuilt(scheduler: Scheduler) -> Scheduler:
+        clone = scheduler.clone()
+        clone.rebuild_index()
+        return clone
+
+    def test_damaged_files_are_rejected(self):
+        save_snapshot(load_csv(os.path.join(HERE, "max_work_days.csv"), compact=True), self.path)
+        with open(self.path, 'rb') as file:
+            good = file.read()
+        header_end = PREAMBLE + int.from_bytes(good[8:16], 'little')
+        header, body = json.loads(good[PREAMBLE:header_end]), good[header_end:]
+
+        def with_header(value) -> bytes:
+            data = json.dumps(value).encode()
+            data += b" " * (-(PREAMBLE + len(data)) % 8)
+            return good[:8] + len(data).to_bytes(8, 'little') + data + body
+
+        def changed(**fields) -> bytes:
+            return with_header({**header, **fields})
+
+        def without_section(name: str) -> bytes:
+            return changed(sections={key: span for key, span in header["sections"].items() if key != name})
+
+        def odd_section(name: str) -> bytes:
+            offset, length = header["sections"][name]
+            return changed(sections={**header["sections"], name: [offset, length - 1]})
+
+        without_itemsizes = {key: value for key, value in header.items() if key != "itemsizes"}
+        index_section = [name for name in header["sections"] if name.startswith("index/")][-1]
+        cases = {
+            "empty": b"",
+            "not a snapshot": b"not a snapshot at all",
+            "truncated": good[:200],
+            "unknown version": b"SCHS\x09" + b"\0" * 20,
+            "header {}": with_header({}),
+            "header []": with_header([]),
+            "header string": with_header("x"),
+            "no itemsizes": with_header(without_itemsizes),
+            "employees not a number": changed(employees="3"),
+            "negative count": changed(schedule_counts=[-1] * len(header["schedule_counts"])),
+            "short schedule counts": changed(schedule_counts=header["schedule_counts"][1:]),
+            "too many scheduled names": changed(schedule_counts=[9] * len(header["schedule_counts"])),
+            "demand shape": changed(demand=[[2]] * len(header["demand"])),
+            "section not a span": changed(sections={**header["sections"], "names": "x"}),
+            "no names section": without_section("names"),
+            "no index section": without_section(index_section),
+            "partial index value": odd_section(index_section),
+            "too many employees": changed(employees=header["employees"] + 1),
+        }
+        for case, data in cases.items():
+            with open(self.path, 'wb') as file:
+                file.write(data)
+            for shared in (False, True):
+                with self.subTest(case=case, shared=shared), self.assertRaises(ValueError):
+                    load_snapshot(self.path, shared=shared)
+
+    def test_names_with_nul_cannot_be_saved(self):
+        scheduler = Scheduler(compact=True)
+        scheduler.add_employee("a\0b", {})
+        with self.assertRaises(ValueError):
+            save_snapshot(scheduler, self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
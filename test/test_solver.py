@@ -0,0 +1,133 @@
+"""MinCostFlowStrategy and check_feasibility against a plain reference solver.
+
+The reference builds the whole flow network explicitly and runs successive
+shortest paths with Bellman-Ford, with none of the solver's shortcuts (pool
+nodes, potentials, starting from preferred shifts), so agreement on maximum
+flow and minimum cost checks those shortcuts.
+
+Run from the repository root:
+    python -m pytest test/
+    python -m unittest discover -s test
+"""
+import random
+import unittest
+
+from python.scheduler import Scheduler, NO_SHIFT_BYTE, SHIFT_BYTES
+from python.solver import MinCostFlowStrategy
+from test_scheduler import random_scheduler
+
+
+def reference_flow(scheduler: Scheduler):
+    """(maximum flow, minimum cost) of covering the open places of ``scheduler``."""
+    roster, width = scheduler.roster, scheduler.roster.width
+    graph = {}  # node -> [[target, capacity, cost, index of the reverse edge], ...]
+
+    def add(u, v, capacity, cost):
+        graph.setdefault(u, []).append([v, capacity, cost, len(graph.setdefault(v, []))])
+        graph[v].append([u, 0, -cost, len(graph[u]) - 1])
+
+    for row in range(len(roster)):
+        left = scheduler.max_days - roster.days_worked[row]
+        if left <= 0:
+            continue
+        add("source", ("employee", row), left, 0)
+        for d in range(width):
+            if roster.assignments[row * width + d] != NO_SHIFT_BYTE:
+                continue
+            add(("employee", row), ("day", row, d), 1, 0)
+            for shift in scheduler.shifts:
+                preferred = roster.preferences[row * width + d] == SHIFT_BYTES[shift]
+                add(("day", row, d), ("slot", d, shift), 1, 0 if preferred else 1)
+    for d, day in enumerate(scheduler.days):
+        for shift in scheduler.shifts:
+            need = scheduler.demand[day][shift] - len(scheduler.schedule[day][shift])
+            if need > 0:
+                add(("slot", d, shift), "sink", need, 0)
+
+    flow = cost = 0
+    while "sink" in graph:
+        distance, parent = {"source": 0}, {}
+        for _ in range(len(graph)):
+            changed = False
+            for u, out in graph.items():
+                if u not in distance:
+                    continue
+                for i, (v, capacity, edge_cost, _) in enumerate(out):
+                    if capacity > 0 and distance[u] + edge_cost < distance.get(v, float("inf")):
+                        distance[v], parent[v] = distance[u] + edge_cost, (u, i)
+                        changed = True
+            if not changed:
+                break
+        if "sink" not in distance:
+            break
+        v = "sink"
+        while v != "source":
+            u, i = parent[v]
+            graph[u][i][1] -= 1
+            graph[v][graph[u][i][3]][1] += 1
+            v = u
+        flow += 1
+        cost += distance["sink"]
+    return flow, cost
+
+
+def random_case(rng: random.Random) -> Scheduler:
+    """A small roster with a random demand table, weekly maximum and partial schedule."""
+    scheduler = random_scheduler(rng, compact=rng.random() < 0.5, size=rng.randrange(1, 13))
+    scheduler.max_days = rng.randrange(1, 6)
+    scheduler.set_demand({day: {shift: rng.randrange(0, 4) for shift in scheduler.shifts}
+                          for day in scheduler.days})
+    if rng.random() < 0.5:
+        roster = scheduler.roster
+        for _ in range(rng.randrange(1, 15)):
+            row, d = rng.randrange(len(roster)), rng.randrange(roster.width)
+            if roster.assignments[row * roster.width + d] == NO_SHIFT_BYTE and \
+                    roster.days_worked[row] < scheduler.max_days:
+                scheduler.assign_shift(scheduler.employees[row], scheduler.days[d], rng.choice(scheduler.shifts))
+    return scheduler
+
+
+class MinCostFlowTest(unittest.TestCase):
+
+    def test_matches_reference_solver(self):
+        rng = random.Random(16)
+        for case in range(300):
+            with self.subTest(case=case):
+                scheduler = random_case(rng)
+                roster, width = scheduler.roster, scheduler.roster.width
+                before = bytes(roster.assignments)
+                need = sum(max(0, scheduler.demand[day][shift] - len(scheduler.schedule[day][shift]))
+                           for day in scheduler.days for shift in scheduler.shifts)
+                flow, cost = reference_flow(scheduler)
+                self.assertEqual(scheduler.check_feasibility().shortfall, need - flow)
+
+                MinCostFlowStrategy().generate(scheduler)
+                added = [(row, d) for row in range(len(roster)) for d in range(width)
+                         if before[row * width + d] != roster.assignments[row * width + d]]
+                self.assertTrue(all(before[row * width + d] == NO_SHIFT_BYTE for row, d in added),
+                                "an existing assignment was changed")
+                unpreferred = sum(roster.assignments[row * width + d] != roster.preferences[row * width + d]
+                                  for row, d in added)
+                self.assertEqual((len(added), unpreferred), (flow, cost))
+                self.assertLessEqual(max(roster.days_worked, default=0), scheduler.max_days)
+                for d, day in enumerate(scheduler.days):
+                    for shift in scheduler.shifts:
+                        names = [roster.names[row] for row in range(len(roster))
+                                 if roster.assignments[row * width + d] == SHIFT_BYTES[shift]]
+                        self.assertEqual(sorted(scheduler.schedule[day][shift]), sorted(names))
+
+    def test_generate_schedule_covers_what_feasibility_allows(self):
+        rng = random.Random(17)
+        for case in range(100):
+            with self.subTest(case=case):
+                scheduler = random_case(rng)
+                scheduler.reset_schedule()
+                shortfall = scheduler.check_feasibility().shortfall
+                scheduler.generate_schedule(MinCostFlowStrategy(), seed=case)
+                uncovered = sum(scheduler.demand[day][shift] - len(scheduler.schedule[day][shift])
+                                for day in scheduler.days for shift in scheduler.shifts)
+                self.assertEqual(uncovered, shortfall)
+
+
+if __name__ == "__main__":
+    unittest.main()